@@ -0,0 +1,164 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import AsyncCacheResponseMixin, invalidate_author_names
+from .filters import AuthorFilter, BookFilter
+from .models import Author, Book
+from .pagination import AuthorPagination, BookPagination
+from .renderers import book_from_row
+from .serializers import AuthorSerializer, BookSerializer
+from .views import (
+    AuthorDetail,
+    AuthorDetailCache,
+    AuthorList,
+    BookDetail,
+    BookDetailCache,
+    BookList,
+    RowReadMixin,
+)
+
+# Read-mostly endpoints on the async ORM, for ASGI workers. DRF views are
+# synchronous, so these are plain Django views that reuse the rows, filters
+# and paginators of the DRF views and answer with the same JSON. Writes
+# other than creating a book stay on the DRF views.
+
+
+class AsyncAPIView(RowReadMixin, View):
+    queryset = None
+    serializer_class = None
+    # The default JSON renderer, without content negotiation.
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, queryset):
+        return queryset
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status,
+            content_type=self.renderer.media_type,
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            # Same bodies as DRF's exception handler.
+            detail = exc.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {"detail": detail}
+            return self.render(detail, status=exc.status_code)
+
+
+class AsyncListView(AsyncCacheResponseMixin, AsyncAPIView):
+    filterset_class = None
+    pagination_class = None
+    uncached_params = ["ids"]
+
+    def filter_queryset(self, queryset):
+        filterset = self.filterset_class(
+            self.request.query_params, queryset=queryset, request=self.request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    async def get(self, request, *args, **kwargs):
+        self.request = Request(request)
+        sparse = self.get_sparse_fields()
+        if "ids" in request.GET:
+            rows = await sync_to_async(self.get_rows_by_id)(self.get_ids())
+            return self.render([self.format_row(row, sparse) for row in rows])
+        # Validating a filter may look up a related row, which is a
+        # synchronous query.
+        rows = await sync_to_async(self.get_rows)(self.get_row_fields(sparse))
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(rows, self.request, self)
+        if page is not None:
+            data = [self.format_row(row, sparse) for row in page]
+            return self.render(paginator.get_paginated_response(data).data)
+        return self.render(
+            [self.format_row(row, sparse) async for row in rows.aiterator()]
+        )
+
+
+class AsyncDetailView(AsyncCacheResponseMixin, AsyncAPIView):
+    async def get(self, request, pk, *args, **kwargs):
+        sparse = self.get_sparse_fields()
+        row = await self.get_rows(self.get_row_fields(sparse)).filter(pk=pk).afirst()
+        if row is None:
+            raise NotFound()
+        return self.render(self.format_row(row, sparse))
+
+
+class AsyncAuthorList(AsyncListView):
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    row_fields = AuthorList.row_fields
+    row_cache_tag = AuthorList.row_cache_tag
+    filterset_class = AuthorFilter
+    pagination_class = AuthorPagination
+
+    def get_cache_tags(self, **kwargs):
+        return ["authors"]
+
+
+class AsyncAuthorDetail(AuthorDetailCache, AsyncDetailView):
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    row_fields = AuthorDetail.row_fields
+
+
+class AsyncBookList(AsyncListView):
+    queryset = Book.objects.select_related("author")
+    serializer_class = BookSerializer
+    row_fields = BookList.row_fields
+    row_cache_tag = BookList.row_cache_tag
+    from_row = staticmethod(book_from_row)
+    field_rows = BookList.field_rows
+    filterset_class = BookFilter
+    pagination_class = BookPagination
+
+    def get_cache_tags(self, **kwargs):
+        return ["books"]
+
+    async def post(self, request, *args, **kwargs):
+        request = Request(
+            request,
+            parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        )
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        author_data = data.pop("author")
+        get_author = sync_to_async(serializer.get_author)
+        try:
+            book = await Book.objects.acreate(
+                author=await get_author(author_data), **data
+            )
+        except IntegrityError:
+            # The cached id belonged to an author deleted meanwhile.
+            await sync_to_async(invalidate_author_names)()
+            book = await Book.objects.acreate(
+                author=await get_author(author_data), **data
+            )
+        return self.render(
+            self.serializer_class(book).data, status=status.HTTP_201_CREATED
+        )
+
+
+class AsyncBookDetail(BookDetailCache, AsyncDetailView):
+    queryset = Book.objects.select_related("author")
+    serializer_class = BookSerializer
+    row_fields = BookDetail.row_fields
+    from_row = staticmethod(book_from_row)
+    field_rows = BookDetail.field_rows
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test import Client
+
+from .models import Author, Book
+from .renderers import book_from_row
+from .serializers import BookSerializer
+from .views import BookList
+
+
+def percentile(values, percent):
+    # Nearest-rank percentile of an already sorted list.
+    index = max(0, -(-len(values) * percent // 100) - 1)
+    return values[int(index)]
+
+
+class Scenario:
+    def __init__(self, name, method, path, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+
+    def request(self, client, rng, book_ids, author_ids):
+        path = self.path.format(
+            book=rng.choice(book_ids), author=rng.choice(author_ids)
+        )
+        body = self.body(rng) if self.body else None
+        if self.method == "get":
+            return client.get(path)
+        return getattr(client, self.method)(
+            path, json.dumps(body), content_type="application/json"
+        )
+
+
+def new_book(rng):
+    return {
+        "author": {"name": f"Benchmark author {rng.randrange(100)}"},
+        "genre": "benchmark",
+        "name": f"Benchmark book {rng.randrange(10**9)}",
+        "publication_date": "2020-10-10",
+    }
+
+
+def changed_book(rng):
+    return {"genre": f"genre {rng.randrange(10**9)}"}
+
+
+SCENARIOS = [
+    Scenario("book_list", "get", "/api/books/"),
+    Scenario("book_list_page", "get", "/api/books/?page_size=100"),
+    Scenario(
+        "book_filter",
+        "get",
+        "/api/books/?publication_date__year=2015&publication_date__month=6",
+    ),
+    Scenario("book_search", "get", "/api/books/?q=a"),
+    Scenario("book_detail", "get", "/api/books/{book}"),
+    Scenario("author_list", "get", "/api/authors/"),
+    Scenario("author_detail", "get", "/api/authors/{author}"),
+    Scenario("book_create", "post", "/api/books/", new_book),
+    Scenario("book_update", "patch", "/api/books/{book}", changed_book),
+]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": len(latencies) / elapsed,
+    }
+
+
+def run_scenario(scenario, iterations, warmup=2, seed=0, client=None):
+    client = client or Client()
+    rng = random.Random(seed)
+    book_ids = list(Book.objects.values_list("pk", flat=True)) or [0]
+    author_ids = list(Author.objects.values_list("pk", flat=True)) or [0]
+
+    for _ in range(warmup):
+        scenario.request(client, rng, book_ids, author_ids)
+
+    # Query counts come from a separate request so the wrapper does not
+    # skew the timings.
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        response = scenario.request(client, rng, book_ids, author_ids)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request_started = time.perf_counter()
+        response = scenario.request(client, rng, book_ids, author_ids)
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    del result["requests"]
+    return {
+        "status": response.status_code,
+        "iterations": iterations,
+        "queries": queries.count,
+        "response_bytes": len(response.content),
+        **result,
+    }
+
+
+def run_benchmarks(scenarios=None, iterations=100, warmup=2, seed=0):
+    return {
+        scenario.name: run_scenario(scenario, iterations, warmup, seed)
+        for scenario in scenarios or SCENARIOS
+    }
+
+
+def compare(results, baseline):
+    # p50 change against a previous run, in percent.
+    return {
+        name: (result["p50_ms"] / baseline[name]["p50_ms"] - 1) * 100
+        for name, result in results.items()
+        if baseline.get(name, {}).get("p50_ms")
+    }
+
+
+# Concurrency: the same read scenarios under concurrent clients, served by
+# the sync views on WSGI threads (like gunicorn gthread workers), the sync
+# views on ASGI (each request runs in its own thread), and the async views
+# on ASGI. Only reads, so SQLite does not serialize the clients on locks.
+
+CONCURRENCY_SCENARIOS = ["book_list_page", "book_detail", "author_detail"]
+STACKS = ["wsgi", "asgi-sync", "asgi-async"]
+
+
+def asgi_scope(path):
+    path, _, query = path.partition("?")
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+    }
+
+
+async def asgi_get(application, path):
+    requested = False
+    started = {}
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # No disconnect: the handler cancels this once it has answered.
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.update(message)
+
+    await application(asgi_scope(path), receive, send)
+    return started["status"]
+
+
+def run_wsgi(paths, concurrency):
+    clients = threading.local()
+
+    def get(path):
+        if not hasattr(clients, "client"):
+            clients.client = Client()
+        request_started = time.perf_counter()
+        status = clients.client.get(path).status_code
+        return status, time.perf_counter() - request_started
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(get, paths))
+
+
+async def run_asgi(paths, concurrency):
+    application = ASGIHandler()
+    queue = list(reversed(paths))
+    results = []
+
+    async def worker():
+        while queue:
+            path = queue.pop()
+            request_started = time.perf_counter()
+            status = await asgi_get(application, path)
+            results.append((status, time.perf_counter() - request_started))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def run_concurrency(scenario, stack, concurrency, requests, seed=0):
+    rng = random.Random(seed)
+    book_ids = list(Book.objects.values_list("pk", flat=True)) or [0]
+    author_ids = list(Author.objects.values_list("pk", flat=True)) or [0]
+    path = scenario.path
+    if stack == "asgi-async":
+        path = path.replace("/api/", "/api/async/", 1)
+    paths = [
+        path.format(book=rng.choice(book_ids), author=rng.choice(author_ids))
+        for _ in range(requests)
+    ]
+
+    started = time.perf_counter()
+    if stack == "wsgi":
+        results = run_wsgi(paths, concurrency)
+    else:
+        results = asyncio.run(run_asgi(paths, concurrency))
+    elapsed = time.perf_counter() - started
+
+    statuses = sorted({status for status, _ in results})
+    return {
+        "status": statuses[0] if len(statuses) == 1 else statuses,
+        "concurrency": concurrency,
+        **summarize([latency for _, latency in results], elapsed),
+    }
+
+
+def run_concurrency_benchmarks(levels, requests=200, seed=0, scenarios=None):
+    by_name = {scenario.name: scenario for scenario in SCENARIOS}
+    return {
+        name: {
+            stack: [
+                run_concurrency(by_name[name], stack, level, requests, seed)
+                for level in levels
+            ]
+            for stack in STACKS
+        }
+        for name in scenarios or CONCURRENCY_SCENARIOS
+    }
+
+
+def time_per_row(build, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        count = len(build())
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / max(count, 1) * 10**6
+
+
+def run_row_benchmark(rows=1000, repeat=5):
+    # CPU time per book, in microseconds, to fetch and build the list
+    # response data through the serializer and through values() rows.
+    queryset = Book.objects.select_related("author").order_by("pk")[:rows]
+    values = queryset.values(*BookList.row_fields)
+    serializer = time_per_row(
+        lambda: BookSerializer(queryset.all(), many=True).data, repeat
+    )
+    row = time_per_row(lambda: [book_from_row(row) for row in values.all()], repeat)
+    return {
+        "rows": min(rows, Book.objects.count()),
+        "serializer_us_per_row": serializer,
+        "values_us_per_row": row,
+        "speedup": serializer / row if row else None,
+    }
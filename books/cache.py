@@ -0,0 +1,402 @@
+import asyncio
+import time
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core.compression import (
+    carries_csrf_token,
+    compress_response,
+    encoded_etag,
+    negotiate,
+)
+from core.metrics import set_cache_status
+from core.routers import is_pinned
+
+TAG_PREFIX = "books:tag:"
+RESPONSE_PREFIX = "books:response:"
+ROW_PREFIX = "books:row:"
+STALE_PREFIX = "books:stale:"
+AUTHOR_ID_PREFIX = "books:author-id:"
+# Every cached response also depends on this tag.
+GLOBAL_TAG = "all"
+# Bumped when author names change, for the name -> id cache.
+AUTHOR_NAMES_TAG = "author-names"
+
+
+def new_version():
+    return time.time_ns()
+
+
+def version_from_datetime(value):
+    return int(value.timestamp()) * 10**9 + value.microsecond * 1000
+
+
+def get_versions(tags, seed=None):
+    # Versions are nanosecond timestamps of the last write, so they double as
+    # Last-Modified values. Missing tags are seeded from `seed()` when given,
+    # otherwise with the current time, which is always safe, in one
+    # set_many() however many there are. A concurrent seed or bump may be
+    # overwritten; that only retires the entries cached under it.
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {}
+    for key in keys:
+        if key not in versions:
+            version = new_version()
+            if seed and key != TAG_PREFIX + GLOBAL_TAG:
+                version = seed() or version
+            missing[key] = version
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(tags):
+    version = new_version()
+    cache.set_many({TAG_PREFIX + tag: version for tag in tags}, None)
+
+
+def invalidate(*tags, using=DEFAULT_DB_ALIAS):
+    # Inside a transaction the tags are bumped now, so reads in it see its
+    # writes, and again after COMMIT: until then other connections still
+    # read the old rows, and cache them under the first new version.
+    bump(tags)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: bump(tags), using=using)
+
+
+def invalidate_all(using=DEFAULT_DB_ALIAS):
+    invalidate(GLOBAL_TAG, using=using)
+
+
+def invalidate_books(pks, using=DEFAULT_DB_ALIAS):
+    invalidate("books", *(f"book:{pk}" for pk in pks), using=using)
+
+
+def invalidate_authors(pks, book_pks=(), using=DEFAULT_DB_ALIAS):
+    # Book responses embed the author's name, so the author's books go too.
+    invalidate(
+        "authors",
+        *(f"author:{pk}" for pk in pks),
+        *(["books", *(f"book:{pk}" for pk in book_pks)] if book_pks else []),
+        using=using,
+    )
+
+
+def invalidate_author_names(using=DEFAULT_DB_ALIAS):
+    invalidate(AUTHOR_NAMES_TAG, using=using)
+
+
+def response_cache_key(request, tags, versions, prefix=RESPONSE_PREFIX):
+    source = "|".join(
+        [
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            *(f"{tag}={version}" for tag, version in zip(tags, versions)),
+        ]
+    )
+    return prefix + md5(source.encode("utf-8")).hexdigest()
+
+
+def may_read_stale(versions):
+    # Unpinned reads go to a replica, which may still lag the last write
+    # these versions record by up to REPLICA_PIN_SECONDS. What they read
+    # then must not be cached under the new versions, where it would hide
+    # the write, even from the client that made it, until it expires.
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and not is_pinned()
+        and new_version() - max(versions) < settings.REPLICA_PIN_SECONDS * 10**9
+    )
+
+
+def get_cached_rows(tag, pks, fetch, timeout):
+    # Rows by pk, cached one by one under the version of their `<tag>:<pk>`
+    # tag. Only the missing pks go to `fetch(pks)`, in one call.
+    versions = get_versions([GLOBAL_TAG, *(f"{tag}:{pk}" for pk in pks)])
+    keys = {
+        pk: f"{ROW_PREFIX}{tag}:{pk}:{versions[0]}:{version}"
+        for pk, version in zip(pks, versions[1:])
+    }
+    cached = cache.get_many(keys.values())
+    rows = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in pks if pk not in rows]
+    if missing:
+        fetched = {row["id"]: row for row in fetch(missing)}
+        row_versions = dict(zip(pks, versions[1:]))
+        cache.set_many(
+            {
+                keys[pk]: row
+                for pk, row in fetched.items()
+                if not may_read_stale([versions[0], row_versions[pk]])
+            },
+            timeout,
+        )
+        rows.update(fetched)
+    return rows
+
+
+def stale_cache_key(request, coding):
+    # The last response built for this URL and encoding, whatever the tag
+    # versions were.
+    return f"{response_cache_key(request, [], [], STALE_PREFIX)}:{coding}"
+
+
+# Single-flight rebuilds: on a miss, the caller that takes `<key>:lock`
+# builds the value while the others serve the stale copy or, without one,
+# wait for the builder. A builder that dies releases the lock when it
+# times out.
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 5
+POLL_INTERVAL = 0.02
+
+
+def single_flight(key, fetch, build, stale=None):
+    value = fetch()
+    if value is not None:
+        return value
+    lock = f"{key}:lock"
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            return build()
+        finally:
+            cache.delete(lock)
+    value = stale() if stale else None
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while value is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = fetch()
+        if value is None and not cache.get(lock):
+            # Released without a cacheable value; build our own.
+            break
+    return build() if value is None else value
+
+
+async def asingle_flight(key, fetch, build, stale=None):
+    value = await fetch()
+    if value is not None:
+        return value
+    lock = f"{key}:lock"
+    if await cache.aadd(lock, 1, LOCK_TIMEOUT):
+        try:
+            return await build()
+        finally:
+            await cache.adelete(lock)
+    value = await stale() if stale else None
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while value is None and time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        value = await fetch()
+        if value is None and not await cache.aget(lock):
+            break
+    return await build() if value is None else value
+
+
+def conditional_response(request, key, versions, coding=None):
+    # The key, suffixed with the content coding, is sent as a strong ETag
+    # and the newest version as Last-Modified. Returns those headers and,
+    # when the client's copy is still current, the 304 (or 412) to answer
+    # with.
+    validators = HttpResponse()
+    validators["ETag"] = encoded_etag(
+        quote_etag(key.removeprefix(RESPONSE_PREFIX)), coding
+    )
+    patch_vary_headers(validators, ["Accept-Encoding"])
+    validators["Last-Modified"] = http_date(max(versions) // 10**9)
+    conditional = get_conditional_response(
+        request,
+        etag=validators["ETag"],
+        last_modified=max(versions) // 10**9,
+        response=validators,
+    )
+    return validators, None if conditional is validators else conditional
+
+
+def set_validators(response, validators):
+    if response.status_code == 200:
+        response["ETag"] = validators["ETag"]
+        response["Last-Modified"] = validators["Last-Modified"]
+    return response
+
+
+class CacheResponseMixin:
+    # Caches rendered GET responses under a key built from the versions of
+    # the view's tags, so a write only invalidates entries that depend on it.
+    # Every write path bumps the tags, so entries can live for a long time.
+    # The same key is sent as a strong ETag, so conditional requests are
+    # answered with 304 before any query or serialization runs.
+    cache_timeout = 60 * 60 * 24
+    # Requests with any of these parameters skip the response cache.
+    uncached_params = ()
+
+    def get_cache_tags(self, **kwargs):
+        raise NotImplementedError
+
+    def use_response_cache(self, request):
+        return request.method in ("GET", "HEAD") and not any(
+            param in request.GET for param in self.uncached_params
+        )
+
+    def get_cache_seed(self, **kwargs):
+        return None
+
+    def get_cache_key(self, request, **kwargs):
+        tags = [GLOBAL_TAG, *self.get_cache_tags(**kwargs)]
+        versions = get_versions(tags, seed=lambda: self.get_cache_seed(**kwargs))
+        return response_cache_key(request, tags, versions), versions
+
+    def store_encoded(self, key, response, coding):
+        # Compressed copies live next to the raw entry, so hits are sent
+        # without compressing again.
+        if compress_response(response, coding):
+            cache.set(f"{key}:{coding}", response, self.cache_timeout)
+
+    def store_response(self, request, key, response, coding):
+        cache.set(key, response, self.cache_timeout)
+        self.store_encoded(key, response, coding)
+        cache.set(stale_cache_key(request, coding), response, self.cache_timeout)
+
+    def get_cached_response(self, key, coding):
+        if coding:
+            response = cache.get(f"{key}:{coding}")
+            if response is not None:
+                return response
+        response = cache.get(key)
+        if response is not None:
+            self.store_encoded(key, response, coding)
+        return response
+
+    def get_stale_response(self, request, coding):
+        # Served as it was, with its own validators, while another request
+        # rebuilds the current one.
+        response = cache.get(stale_cache_key(request, coding))
+        if response is not None:
+            set_cache_status("stale")
+            response.keep_validators = True
+        return response
+
+    def build_response(self, request, key, coding, validators, *args, **kwargs):
+        # Without validators the response may come from a lagging replica,
+        # so it is neither stored nor validated.
+        set_cache_status("miss")
+        response = super().dispatch(request, *args, **kwargs)
+        if validators is None:
+            response.keep_validators = True
+        elif response.status_code == 200 and hasattr(response, "render"):
+            # Rendered here, holding the lock, with the validators stored.
+            response.render()
+            if carries_csrf_token(request, response):
+                # A page for this client only, never shared or compressed.
+                response.keep_validators = True
+                return response
+            set_validators(response, validators)
+            self.store_response(request, key, response, coding)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.use_response_cache(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key, versions = self.get_cache_key(request, **kwargs)
+        coding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        validators, conditional = conditional_response(request, key, versions, coding)
+        if conditional is not None:
+            set_cache_status("not_modified")
+            return conditional
+        # Entries are only built from reads the replicas cannot have missed.
+        fresh = None if may_read_stale(versions) else validators
+
+        set_cache_status("hit")
+        response = single_flight(
+            key,
+            fetch=lambda: self.get_cached_response(key, coding),
+            build=lambda: self.build_response(
+                request, key, coding, fresh, *args, **kwargs
+            ),
+            # A client pinned to the primary after a write must see it.
+            stale=None
+            if is_pinned()
+            else lambda: self.get_stale_response(request, coding),
+        )
+        if getattr(response, "keep_validators", False):
+            return response
+        return set_validators(response, validators)
+
+
+class AsyncCacheResponseMixin(CacheResponseMixin):
+    # The same caching for async views. Tag versions and the seed run in one
+    # thread hop: the async cache API fetches keys one by one, and the seed
+    # is a synchronous query.
+    async def astore_encoded(self, key, response, coding):
+        if compress_response(response, coding):
+            await cache.aset(f"{key}:{coding}", response, self.cache_timeout)
+
+    async def aget_cached_response(self, key, coding):
+        if coding:
+            response = await cache.aget(f"{key}:{coding}")
+            if response is not None:
+                return response
+        response = await cache.aget(key)
+        if response is not None:
+            await self.astore_encoded(key, response, coding)
+        return response
+
+    async def aget_stale_response(self, request, coding):
+        response = await cache.aget(stale_cache_key(request, coding))
+        if response is not None:
+            set_cache_status("stale")
+            response.keep_validators = True
+        return response
+
+    async def abuild_response(self, request, key, coding, validators, *args, **kwargs):
+        set_cache_status("miss")
+        response = await super(CacheResponseMixin, self).dispatch(
+            request, *args, **kwargs
+        )
+        if validators is None:
+            response.keep_validators = True
+        elif response.status_code == 200:
+            set_validators(response, validators)
+            await cache.aset(key, response, self.cache_timeout)
+            await self.astore_encoded(key, response, coding)
+            await cache.aset(
+                stale_cache_key(request, coding), response, self.cache_timeout
+            )
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not self.use_response_cache(request):
+            return await super(CacheResponseMixin, self).dispatch(
+                request, *args, **kwargs
+            )
+
+        key, versions = await sync_to_async(self.get_cache_key)(request, **kwargs)
+        coding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        validators, conditional = conditional_response(request, key, versions, coding)
+        if conditional is not None:
+            set_cache_status("not_modified")
+            return conditional
+        fresh = None if may_read_stale(versions) else validators
+
+        set_cache_status("hit")
+        response = await asingle_flight(
+            key,
+            fetch=lambda: self.aget_cached_response(key, coding),
+            build=lambda: self.abuild_response(
+                request, key, coding, fresh, *args, **kwargs
+            ),
+            stale=None
+            if is_pinned()
+            else lambda: self.aget_stale_response(request, coding),
+        )
+        if getattr(response, "keep_validators", False):
+            return response
+        return set_validators(response, validators)
@@ -0,0 +1,32 @@
+import random
+from datetime import date
+
+from faker import Faker
+
+# Imported by the spawned fake_date workers, so it must not import Django
+# models: the app registry is not set up in them.
+
+START_DATE = date(2004, 1, 1)
+END_DATE = date(2023, 12, 31)
+
+
+def generate_chunk(args):
+    # Runs in worker processes. Every chunk gets its own seed, so the data
+    # does not depend on the number of workers.
+    seed, chunk, first, count, books_per_author = args
+    fake = Faker("uk_UA")
+    rng = random.Random(None if seed is None else f"{seed}:{chunk}")
+    fake.seed_instance(rng.random())
+    authors = []
+    for index in range(first, first + count):
+        books = []
+        for _ in range(books_per_author or rng.randint(1, 3)):
+            books.append(
+                (
+                    fake.catch_phrase()[:100],
+                    fake.word(),
+                    fake.date_between_dates(START_DATE, END_DATE),
+                )
+            )
+        authors.append((index, fake.name(), books))
+    return authors
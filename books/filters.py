@@ -2,6 +2,7 @@ import django_filters
 from rest_framework.exceptions import ValidationError
 
 from .models import Author, Book
+from .search import search_books
 
 
 class AuthorFilter(django_filters.FilterSet):
@@ -26,6 +27,7 @@ class BookFilter(django_filters.FilterSet):
     publication_date__month = django_filters.NumberFilter(
         method="filter_publication_date_month", lookup_expr="month"
     )
+    q = django_filters.CharFilter(method="filter_search")
 
     @staticmethod
     def filter_publication_date_day(queryset, name, value):
@@ -45,6 +47,10 @@ class BookFilter(django_filters.FilterSet):
                 "Invalid month. Please enter a number between 1 and 12."
             )
 
+    @staticmethod
+    def filter_search(queryset, name, value):
+        return search_books(queryset, value)
+
     class Meta:
         model = Book
         fields = ["name", "author", "genre", "publication_date"]
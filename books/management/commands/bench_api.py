@@ -0,0 +1,168 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from ...benchmarks import (
+    SCENARIOS,
+    compare,
+    run_benchmarks,
+    run_concurrency_benchmarks,
+    run_row_benchmark,
+)
+from ...testing import DUMMY_CACHES
+
+# The response and author name cache keys do not identify the database, so
+# the throwaway database must not share the configured cache.
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench_api",
+    }
+}
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the books API in-process against a throwaway test database "
+        "of the configured engine and writes the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", type=int, default=1000)
+        parser.add_argument("--books-per-author", type=int, default=10)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=[scenario.name for scenario in SCENARIOS],
+            help="Run only this scenario; may be repeated.",
+        )
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help=(
+                "Keep the response cache, in process memory, instead of "
+                "measuring misses."
+            ),
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            action="append",
+            help=(
+                "Also compare the WSGI, ASGI sync and ASGI async stacks with "
+                "this many concurrent clients; may be repeated."
+            ),
+        )
+        parser.add_argument("--concurrency-requests", type=int, default=200)
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument(
+            "--compare", help="Previous results file to print p50 changes against."
+        )
+
+    def run(self, options):
+        call_command(
+            "fake_date",
+            authors=options["authors"],
+            books_per_author=options["books_per_author"],
+            seed=options["seed"],
+            batch_size=5000,
+            stdout=self.stdout,
+        )
+        scenarios = [
+            scenario
+            for scenario in SCENARIOS
+            if not options["scenario"] or scenario.name in options["scenario"]
+        ]
+        caches = {} if options["cache"] else {"CACHES": DUMMY_CACHES}
+        with override_settings(**caches):
+            results = run_benchmarks(
+                scenarios, iterations=options["iterations"], seed=options["seed"]
+            )
+            rows = run_row_benchmark()
+            concurrency = {}
+            if options["concurrency"]:
+                concurrency = run_concurrency_benchmarks(
+                    options["concurrency"],
+                    requests=options["concurrency_requests"],
+                    seed=options["seed"],
+                )
+        return results, rows, concurrency
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=BENCH_CACHES):
+                try:
+                    results, rows, concurrency = self.run(options)
+                finally:
+                    cache.clear()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "commit": current_commit(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "authors": options["authors"],
+            "books": options["authors"] * options["books_per_author"],
+            "cache": options["cache"],
+            "scenarios": results,
+            "rows": rows,
+        }
+        if concurrency:
+            report["concurrency"] = concurrency
+        with open(options["output"], "w") as output:
+            json.dump(report, output, indent=2)
+
+        changes = {}
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                changes = compare(results, json.load(baseline)["scenarios"])
+        for name, result in results.items():
+            change = f" ({changes[name]:+.1f}%)" if name in changes else ""
+            self.stdout.write(
+                f"{name:16} p50 {result['p50_ms']:8.2f}ms{change:10} "
+                f"p99 {result['p99_ms']:8.2f}ms "
+                f"{result['throughput_rps']:8.1f} req/s "
+                f"{result['queries']:3} queries"
+            )
+        self.stdout.write(
+            f"list data per row: serializer {rows['serializer_us_per_row']:.1f}us, "
+            f"values() rows {rows['values_us_per_row']:.1f}us "
+            f"({rows['speedup']:.1f}x)"
+        )
+        if concurrency:
+            for name, stacks in concurrency.items():
+                for stack, levels in stacks.items():
+                    for result in levels:
+                        self.stdout.write(
+                            f"{name:16} {stack:10} x{result['concurrency']:<4} "
+                            f"p50 {result['p50_ms']:8.2f}ms "
+                            f"p99 {result['p99_ms']:8.2f}ms "
+                            f"{result['throughput_rps']:8.1f} req/s"
+                        )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
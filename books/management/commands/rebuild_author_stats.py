@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Author
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts book_count and latest_publication_date of every author, "
+        "after writes that bypassed the models."
+    )
+
+    def handle(self, *args, **options):
+        rows = Author.objects.refresh_stats()
+        self.stdout.write(self.style.SUCCESS(f"{rows} authors recounted"))
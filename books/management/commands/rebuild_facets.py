@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ...cache import invalidate_books
+from ...models import FacetCount
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the genre, year and author facets from the books, after "
+        "writes that bypassed the models."
+    )
+
+    def handle(self, *args, **options):
+        FacetCount.objects.rebuild()
+        invalidate_books([])
+        self.stdout.write(
+            self.style.SUCCESS(f"{FacetCount.objects.count()} facet values counted")
+        )
@@ -0,0 +1,52 @@
+# Generated by Django 5.0 on 2026-10-18 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+import books.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name="author",
+            name="name",
+            field=models.CharField(
+                max_length=100, validators=[books.models.validate_name]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="book",
+            name="genre",
+            field=models.CharField(
+                max_length=50, validators=[books.models.validate_name]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="book",
+            name="name",
+            field=models.CharField(
+                max_length=100, validators=[books.models.validate_name]
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+from books.operations import VendorRunSQL
+
+
+class Migration(migrations.Migration):
+    # PostgreSQL: trigram GIN indexes for the `icontains` filters and
+    # tsvector GIN indexes for `?q=`. The SQLite FTS table is managed by the
+    # post_migrate hook in books.signals, since later table rebuilds would
+    # break its triggers.
+    dependencies = [
+        ("books", "0002_author_updated_at_book_updated_at"),
+    ]
+
+    operations = [
+        VendorRunSQL(
+            "postgresql",
+            sql=[
+                "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+                "CREATE INDEX books_book_name_trgm "
+                "ON books_book USING gin (UPPER(name) gin_trgm_ops)",
+                "CREATE INDEX books_book_genre_trgm "
+                "ON books_book USING gin (UPPER(genre) gin_trgm_ops)",
+                "CREATE INDEX books_author_name_trgm "
+                "ON books_author USING gin (UPPER(name) gin_trgm_ops)",
+                "CREATE INDEX books_book_search ON books_book USING gin "
+                "(to_tsvector('simple'::regconfig, name || ' ' || genre))",
+                "CREATE INDEX books_author_search ON books_author USING gin "
+                "(to_tsvector('simple'::regconfig, name))",
+            ],
+            reverse_sql=[
+                "DROP INDEX books_author_search",
+                "DROP INDEX books_book_search",
+                "DROP INDEX books_author_name_trgm",
+                "DROP INDEX books_book_genre_trgm",
+                "DROP INDEX books_book_name_trgm",
+            ],
+        ),
+    ]
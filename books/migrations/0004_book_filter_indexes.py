@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-18 15:52
+
+from django.db import migrations, models
+
+from books.operations import VendorRunSQL
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0003_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["publication_date"], name="book_pub_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["author", "publication_date"], name="book_author_pub_date_idx"
+            ),
+        ),
+        # Only PostgreSQL compiles `__month` and `__day` to the EXTRACT() these
+        # indexes hold. SQLite calls django_date_extract() with the kind as a
+        # parameter, which no index serves, so they stay out of the model
+        # state and off other databases.
+        VendorRunSQL(
+            "postgresql",
+            sql=[
+                "CREATE INDEX book_pub_month_idx "
+                "ON books_book ((EXTRACT(MONTH FROM publication_date)))",
+                "CREATE INDEX book_pub_day_idx "
+                "ON books_book ((EXTRACT(DAY FROM publication_date)))",
+            ],
+            reverse_sql=[
+                "DROP INDEX book_pub_day_idx",
+                "DROP INDEX book_pub_month_idx",
+            ],
+        ),
+    ]
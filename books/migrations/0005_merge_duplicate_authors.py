@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_authors(apps, schema_editor):
+    # Keep the oldest author for every name and move the books of the
+    # duplicates onto it, so the unique constraint can be added.
+    Author = apps.get_model("books", "Author")
+    Book = apps.get_model("books", "Book")
+    # Read from the database being migrated, not from a routed replica.
+    db = schema_editor.connection.alias
+    duplicates = (
+        Author.objects.using(db)
+        .values("name")
+        .annotate(first=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        others = (
+            Author.objects.using(db)
+            .filter(name=duplicate["name"])
+            .exclude(id=duplicate["first"])
+        )
+        Book.objects.using(db).filter(author__in=others).update(
+            author_id=duplicate["first"]
+        )
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0004_book_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_authors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+import books.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0005_merge_duplicate_authors"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="author",
+            name="name",
+            field=models.CharField(
+                max_length=100, unique=True, validators=[books.models.validate_name]
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-18 16:34
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+
+def count_facets(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    FacetCount = apps.get_model("books", "FacetCount")
+    db = schema_editor.connection.alias
+    books = Book.objects.using(db).order_by()
+    groups = [
+        ("genre", books.values(value=models.F("genre"))),
+        ("year", books.values(value=ExtractYear("publication_date"))),
+        ("author", books.values(value=models.F("author_id"))),
+    ]
+    FacetCount.objects.using(db).bulk_create(
+        [
+            FacetCount(facet=facet, value=str(row["value"]), count=row["count"])
+            for facet, rows in groups
+            for row in rows.annotate(count=Count("id"))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0006_author_name_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FacetCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("facet", models.CharField(max_length=10)),
+                ("value", models.CharField(max_length=100)),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["facet", "-count"], name="facet_count_top_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="facetcount",
+            constraint=models.UniqueConstraint(
+                fields=("facet", "value"), name="facet_count_unique"
+            ),
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
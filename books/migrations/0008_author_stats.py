@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_author_books(apps, schema_editor):
+    # The same UPDATE as AuthorQuerySet.refresh_stats(), without touching
+    # updated_at.
+    Author = apps.get_model("books", "Author")
+    Book = apps.get_model("books", "Book")
+    db = schema_editor.connection.alias
+    books = Book.objects.using(db).filter(author=OuterRef("pk")).order_by()
+    Author.objects.using(db).update(
+        book_count=Coalesce(
+            Subquery(
+                books.values("author").annotate(count=Count("id")).values("count")
+            ),
+            0,
+        ),
+        latest_publication_date=Subquery(
+            books.order_by("-publication_date").values("publication_date")[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0007_facet_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="book_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="latest_publication_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(count_author_books, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+from books.operations import VendorRunSQL
+
+# The book name, genre and author name, in one document per book, so the
+# terms of a query may match any of them. A generated column cannot read
+# the author's name, so triggers keep it up to date.
+DOCUMENT = (
+    "to_tsvector('simple'::regconfig, {book}.name || ' ' || {book}.genre "
+    "|| ' ' || {author_name})"
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0008_author_stats"),
+    ]
+
+    operations = [
+        VendorRunSQL(
+            "postgresql",
+            sql=[
+                "DROP INDEX books_book_search",
+                "DROP INDEX books_author_search",
+                "ALTER TABLE books_book ADD COLUMN search_document tsvector",
+                "CREATE FUNCTION books_book_search_document() RETURNS trigger "
+                "AS $$ BEGIN NEW.search_document := "
+                + DOCUMENT.format(
+                    book="NEW",
+                    author_name=(
+                        "(SELECT name FROM books_author WHERE id = NEW.author_id)"
+                    ),
+                )
+                + "; RETURN NEW; END $$ LANGUAGE plpgsql",
+                "CREATE TRIGGER books_book_search_document "
+                "BEFORE INSERT OR UPDATE OF name, genre, author_id ON books_book "
+                "FOR EACH ROW EXECUTE FUNCTION books_book_search_document()",
+                "CREATE FUNCTION books_author_search_document() RETURNS trigger "
+                "AS $$ BEGIN UPDATE books_book SET search_document = "
+                + DOCUMENT.format(book="books_book", author_name="NEW.name")
+                + " WHERE author_id = NEW.id; RETURN NULL; END $$ LANGUAGE plpgsql",
+                "CREATE TRIGGER books_author_search_document "
+                "AFTER UPDATE OF name ON books_author "
+                "FOR EACH ROW EXECUTE FUNCTION books_author_search_document()",
+                # The existing rows, once.
+                "UPDATE books_book b SET search_document = "
+                + DOCUMENT.format(book="b", author_name="a.name")
+                + " FROM books_author a WHERE a.id = b.author_id",
+                "CREATE INDEX books_book_search_document "
+                "ON books_book USING gin (search_document)",
+            ],
+            reverse_sql=[
+                "DROP INDEX books_book_search_document",
+                "DROP TRIGGER books_author_search_document ON books_author",
+                "DROP FUNCTION books_author_search_document()",
+                "DROP TRIGGER books_book_search_document ON books_book",
+                "DROP FUNCTION books_book_search_document()",
+                "ALTER TABLE books_book DROP COLUMN search_document",
+                "CREATE INDEX books_book_search ON books_book USING gin "
+                "(to_tsvector('simple'::regconfig, name || ' ' || genre))",
+                "CREATE INDEX books_author_search ON books_author USING gin "
+                "(to_tsvector('simple'::regconfig, name))",
+            ],
+        ),
+    ]
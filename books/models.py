@@ -1,5 +1,26 @@
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date
+from hashlib import md5
+
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, ExtractYear
+from django.utils import timezone
+
+from .cache import (
+    AUTHOR_ID_PREFIX,
+    AUTHOR_NAMES_TAG,
+    GLOBAL_TAG,
+    get_versions,
+    invalidate_all,
+    invalidate_author_names,
+    invalidate_authors,
+    invalidate_books,
+)
 
 # Create your models here.
 
@@ -9,8 +30,274 @@ def validate_name(value):
         raise ValidationError(f"Value is too short.")
 
 
+class AuthorQuerySet(models.QuerySet):
+    lookup_batch_size = 500
+
+    def delete(self):
+        # Cascaded books update the facet counts once, not per book.
+        with batch_book_changes(self.db):
+            return super().delete()
+
+    delete.alters_data = True
+
+    def refresh_stats(self, pks=None, touch=True):
+        # Recounts book_count and latest_publication_date of these authors,
+        # or of all of them, with correlated subqueries, in one UPDATE per
+        # batch of pks.
+        # `touch` moves updated_at, which seeds the cache versions. Given
+        # pks, only authors whose stats changed are written and invalidated,
+        # so most book edits leave the author list cached.
+        books = Book.objects.filter(author=OuterRef("pk")).order_by()
+        book_count = Coalesce(
+            Subquery(
+                books.values("author").annotate(count=Count("pk")).values("count")
+            ),
+            0,
+        )
+        latest = Subquery(
+            books.order_by("-publication_date").values("publication_date")[:1]
+        )
+        stats = {
+            "book_count": book_count,
+            "latest_publication_date": latest,
+            **({"updated_at": timezone.now()} if touch else {}),
+        }
+        # The plain update: names do not change, so the authors' books and
+        # the name cache stay valid.
+        if pks is None:
+            rows = super(AuthorQuerySet, self.all()).update(**stats)
+            invalidate_all(using=self.db)
+            return rows
+        pks = list(pks)
+        never = Value(date.min)
+        rows = 0
+        for start in range(0, len(pks), self.lookup_batch_size):
+            batch = pks[start : start + self.lookup_batch_size]
+            changed = (
+                self.filter(pk__in=batch)
+                .alias(
+                    new_count=book_count,
+                    new_latest=Coalesce(latest, never),
+                    old_latest=Coalesce("latest_publication_date", never),
+                )
+                .filter(~Q(book_count=F("new_count")) | ~Q(old_latest=F("new_latest")))
+            )
+            updated = super(AuthorQuerySet, changed).update(**stats)
+            if updated:
+                invalidate_authors(batch, using=self.db)
+            rows += updated
+        return rows
+
+    refresh_stats.alters_data = True
+
+    def upsert(self, objs, batch_size=None):
+        # Returns the existing or new author for every object. Existing rows
+        # are only read; the others go through INSERT ... ON CONFLICT (name)
+        # DO UPDATE ... RETURNING id, which also returns the rows a
+        # concurrent request inserted in the meantime. No author's data
+        # changes, so only the list is invalidated, and only for inserts.
+        names = [obj.name for obj in objs]
+        ids = {}
+        for start in range(0, len(names), self.lookup_batch_size):
+            rows = self.filter(
+                name__in=names[start : start + self.lookup_batch_size]
+            ).values_list("name", "pk")
+            ids.update(rows)
+        missing = [obj for obj in objs if obj.name not in ids]
+        if missing:
+            super().bulk_create(
+                missing,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=["name"],
+            )
+            invalidate_authors([], using=self.db)
+        for obj in objs:
+            if obj.name in ids:
+                obj.pk = ids[obj.name]
+                obj._state.adding = False
+                obj._state.db = self.db
+        return objs
+
+    def resolve_names(self, names, batch_size=None):
+        # Maps every name to an author id, upserting the missing authors.
+        authors = self.upsert(
+            [Author(name=name) for name in set(names)], batch_size=batch_size
+        )
+        return {author.name: author.pk for author in authors}
+
+    # Queryset writes skip post_save, so they invalidate the cache themselves.
+    # The matching rows are locked and listed first, then updated by pk in
+    # batches, each invalidating its authors and their books.
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        authors = self.model.objects.using(self.db)
+        books = Book.objects.using(self.db)
+        rows = 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(
+                self.select_for_update(of=("self",)).values_list("pk", flat=True)
+            )
+            for start in range(0, len(pks), self.lookup_batch_size):
+                batch = pks[start : start + self.lookup_batch_size]
+                rows += super(AuthorQuerySet, authors.filter(pk__in=batch)).update(
+                    **kwargs
+                )
+                book_pks = books.filter(author__in=batch).values_list("pk", flat=True)
+                invalidate_authors(batch, list(book_pks), using=self.db)
+            invalidate_author_names(using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # Fresh rows have no cached detail entries; upserted ones may.
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get("update_conflicts"):
+            invalidate_authors(
+                [obj.pk for obj in objs if obj.pk is not None], using=self.db
+            )
+        else:
+            invalidate_authors([], using=self.db)
+        return objs
+
+
+class BookQuerySet(models.QuerySet):
+    update_batch_size = 500
+    facet_fields = {"genre", "publication_date", "author", "author_id"}
+
+    def facet_rows(self, facet):
+        # (value, books) per value of one facet, from one grouped query.
+        # Values are strings, as FacetCount stores and orders them.
+        column = {
+            "genre": F("genre"),
+            "year": Cast(ExtractYear("publication_date"), models.CharField()),
+            "author": Cast("author_id", models.CharField()),
+        }[facet]
+        return (
+            self.order_by()
+            .values(value=column)
+            .annotate(count=Count("pk"))
+            .values_list("value", "count")
+        )
+
+    def facet_counts(self):
+        # Books per facet value, one grouped query per facet.
+        return Counter(
+            {
+                (facet, value): count
+                for facet in FacetCount.facets
+                for value, count in self.facet_rows(facet)
+            }
+        )
+
+    def top_facet_counts(self, limit):
+        # The `limit` most frequent values of each facet, ranked in SQL.
+        return {
+            facet: list(self.facet_rows(facet).order_by("-count", "value")[:limit])
+            for facet in FacetCount.facets
+        }
+
+    # bulk_update() writes through update() as well.
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        facets = self.facet_fields & kwargs.keys()
+        if not self.query.has_filters() and _pending_changes.get() is None:
+            return self.update_all(facets, **kwargs)
+        # The matching rows are locked and listed first, then updated by pk
+        # in batches, so rows that start matching meanwhile are not written
+        # without being counted, and no statement has unbounded parameters.
+        books = self.model.objects.using(self.db)
+        counts, authors, rows = Counter(), set(), 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(
+                self.select_for_update(of=("self",)).values_list("pk", flat=True)
+            )
+            for start in range(0, len(pks), self.update_batch_size):
+                batch = books.filter(pk__in=pks[start : start + self.update_batch_size])
+                if facets:
+                    before = batch.facet_counts()
+                rows += super(BookQuerySet, batch).update(**kwargs)
+                if facets:
+                    after = batch.facet_counts()
+                    if facets - {"genre"}:
+                        authors.update(
+                            int(value)
+                            for facet, value in after.keys() | before.keys()
+                            if facet == "author"
+                        )
+                    counts.update(after)
+                    counts.subtract(before)
+            if facets:
+                record_book_changes(counts, authors)
+        for start in range(0, len(pks), self.update_batch_size):
+            invalidate_books(pks[start : start + self.update_batch_size], using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def update_all(self, facets, **kwargs):
+        # A whole-table update recounts with aggregate SQL and invalidates
+        # everything at once instead of one tag per row.
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = super().update(**kwargs)
+            if facets:
+                FacetCount.objects.using(self.db).rebuild()
+            if facets - {"genre"}:
+                Author.objects.using(self.db).refresh_stats()
+        invalidate_all(using=self.db)
+        return rows
+
+    def delete(self):
+        with batch_book_changes(self.db):
+            return super().delete()
+
+    delete.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        # Only objects with a pk can conflict; their rows are counted
+        # before and after, like update() does, the others as inserted.
+        conflicts = kwargs.get("update_conflicts")
+        pks = [obj.pk for obj in objs if obj.pk is not None] if conflicts else []
+        inserted = [obj for obj in objs if not conflicts or obj.pk is None]
+        with transaction.atomic(using=self.db, savepoint=False):
+            if pks:
+                before = self.model.objects.filter(pk__in=pks).facet_counts()
+            objs = super().bulk_create(objs, *args, **kwargs)
+            counts = Counter(
+                key for obj in inserted for key in Book.facet_keys(obj.tracked_values())
+            )
+            authors = {obj.author_id for obj in inserted}
+            if pks:
+                replaced = self.model.objects.filter(pk__in=pks).facet_counts()
+                authors |= {
+                    int(value)
+                    for facet, value in replaced.keys() | before.keys()
+                    if facet == "author"
+                }
+                counts.update(replaced)
+                counts.subtract(before)
+            record_book_changes(counts, authors)
+        if conflicts:
+            invalidate_books(
+                [obj.pk for obj in objs if obj.pk is not None], using=self.db
+            )
+        else:
+            invalidate_books([], using=self.db)
+        return objs
+
+
 class Author(models.Model):
-    name = models.CharField(max_length=100, validators=[validate_name])
+    name = models.CharField(max_length=100, unique=True, validators=[validate_name])
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from the author's books by the Book write paths; see
+    # `AuthorQuerySet.refresh_stats()` and the rebuild_author_stats command.
+    book_count = models.PositiveIntegerField(default=0, editable=False)
+    latest_publication_date = models.DateField(null=True, editable=False)
+
+    objects = AuthorQuerySet.as_manager()
 
 
 class Book(models.Model):
@@ -18,3 +305,157 @@ class Book(models.Model):
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="book")
     genre = models.CharField(max_length=50, validators=[validate_name])
     publication_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookQuerySet.as_manager()
+
+    # The fields the facet counts and author stats depend on.
+    tracked_fields = ("genre", "publication_date", "author_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so saves can move the counts off the old values.
+        if set(cls.tracked_fields) <= set(field_names):
+            instance._loaded_values = instance.tracked_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        if fields is None and not set(self.tracked_fields) & self.get_deferred_fields():
+            self._loaded_values = self.tracked_values()
+
+    def tracked_values(self):
+        # Dates may still be strings on objects built for bulk_create().
+        published = self._meta.get_field("publication_date").to_python(
+            self.publication_date
+        )
+        return (self.genre, published, self.author_id)
+
+    @staticmethod
+    def facet_keys(values):
+        genre, published, author_id = values
+        return [
+            ("genre", genre),
+            ("year", str(published.year)),
+            ("author", str(author_id)),
+        ]
+
+    class Meta:
+        # `publication_date__year` compiles to a BETWEEN range, so the plain
+        # date index serves it. Month and day compile to EXTRACT(), indexed
+        # on PostgreSQL only by migration 0004.
+        indexes = [
+            models.Index(fields=["publication_date"], name="book_pub_date_idx"),
+            models.Index(
+                fields=["author", "publication_date"], name="book_author_pub_date_idx"
+            ),
+        ]
+
+
+_pending_changes = contextvars.ContextVar("book_changes", default=None)
+
+
+def record_book_changes(facets, authors=()):
+    # Facet count changes and the authors whose stats changed. Inside
+    # `batch_book_changes()` they are collected and written once at the
+    # end, for deletes that send a signal per book.
+    pending = _pending_changes.get()
+    if pending is not None:
+        pending[0].update(facets)
+        pending[1].update(authors)
+        return
+    FacetCount.objects.add(facets)
+    if authors:
+        Author.objects.refresh_stats(authors)
+
+
+@contextmanager
+def batch_book_changes(using):
+    if _pending_changes.get() is not None:
+        yield
+        return
+    facets, authors = Counter(), set()
+    token = _pending_changes.set((facets, authors))
+    with transaction.atomic(using=using, savepoint=False):
+        try:
+            yield
+        finally:
+            _pending_changes.reset(token)
+        record_book_changes(facets, authors)
+
+
+class FacetCountQuerySet(models.QuerySet):
+    update_batch_size = 500
+
+    def add(self, counts):
+        # In key order, so concurrent upserts lock the rows in the same order
+        # and cannot deadlock.
+        rows = sorted((*key, count) for key, count in counts.items() if count)
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            # One upsert per batch, adding to the stored counts; SQLite and
+            # PostgreSQL both support ON CONFLICT.
+            for start in range(0, len(rows), self.update_batch_size):
+                batch = rows[start : start + self.update_batch_size]
+                cursor.execute(
+                    f"INSERT INTO {table} (facet, value, count) VALUES "
+                    + ", ".join(["(%s, %s, %s)"] * len(batch))
+                    + " ON CONFLICT (facet, value) "
+                    f"DO UPDATE SET count = {table}.count + excluded.count",
+                    [param for row in batch for param in row],
+                )
+
+    def rebuild(self):
+        # Recounts everything, for writes that bypass the model: raw
+        # deletes, raw SQL, or counts that drifted.
+        with transaction.atomic(using=self.db, savepoint=False):
+            counts = Book.objects.using(self.db).facet_counts()
+            self.all()._raw_delete(self.db)
+            self.bulk_create(
+                [
+                    FacetCount(facet=facet, value=value, count=count)
+                    for (facet, value), count in counts.items()
+                ],
+                batch_size=1000,
+            )
+
+
+class FacetCount(models.Model):
+    # Books per genre, publication year and author id, for the unfiltered
+    # /api/books/facets/. Kept up to date by the Book signals and querysets.
+    facet = models.CharField(max_length=10)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    facets = ("genre", "year", "author")
+
+    objects = FacetCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facet", "value"], name="facet_count_unique"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["facet", "-count"], name="facet_count_top_idx"),
+        ]
+
+
+AUTHOR_ID_TIMEOUT = 60 * 60 * 24
+
+
+def author_id_for_name(name):
+    # Name -> id, cached in the shared cache under the versions of the
+    # global and author names tags, so a rename or delete in any process
+    # retires the entries of every process. An id read just before a
+    # delete commits surfaces as an IntegrityError on insert.
+    versions = get_versions([GLOBAL_TAG, AUTHOR_NAMES_TAG])
+    digest = md5(name.encode("utf-8")).hexdigest()
+    key = f"{AUTHOR_ID_PREFIX}{versions[0]}:{versions[1]}:{digest}"
+    author_id = cache.get(key)
+    if author_id is None:
+        author_id = Author.objects.resolve_names([name])[name]
+        cache.set(key, author_id, AUTHOR_ID_TIMEOUT)
+    return author_id
@@ -0,0 +1,176 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # Opt-in: only used when the client sends `cursor` or `page_size`.
+    # Pages are fetched with `(col, id) > (last_col, last_id)` instead of
+    # OFFSET, so deep pages cost the same as the first one.
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    page_size = 100
+    max_page_size = 1000
+    orderings = {"id": ("id",)}
+    default_ordering = "id"
+    # Querysets ranked by `search_books()` page by relevance, on
+    # (rank, id), whatever `ordering` asks for.
+    rank_annotation = "search_rank"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page([instance async for instance in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        # The unevaluated page, with one extra row to tell if there is a next.
+        params = request.query_params
+        if (
+            self.cursor_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering_key, self.ordering = self.get_ordering(request)
+        if self.rank_annotation in queryset.query.annotations:
+            queryset = self.get_ranked_queryset(queryset)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position))
+        queryset = queryset.order_by(*self.ordering)
+        return queryset[: self.page_size + 1]
+
+    def get_ranked_queryset(self, queryset):
+        rank = self.rank_annotation
+        self.ordering_key, self.ordering = rank, (f"-{rank}", "id")
+        # values() rows need the rank for the cursor, but values() with
+        # field names stops selecting other annotations.
+        queryset = queryset.all()
+        queryset.query.append_annotation_mask([rank])
+        return queryset
+
+    def set_page(self, results):
+        self.page = results[: self.page_size]
+        self.has_next = len(results) > self.page_size
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        key = request.query_params.get(self.ordering_query_param, "")
+        descending = key.startswith("-")
+        fields = self.orderings.get(key.lstrip("-"))
+        if fields is None:
+            key, descending = self.default_ordering, False
+            fields = self.orderings[key]
+        prefix = "-" if descending else ""
+        return prefix + key.lstrip("-"), tuple(prefix + field for field in fields)
+
+    def keyset_filter(self, position):
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, position))):
+            lookup = "lt" if field.startswith("-") else "gt"
+            field = field.lstrip("-")
+            step = Q(**{f"{field}__{lookup}": value})
+            if condition is not None:
+                step |= Q(**{field: value}) & condition
+            condition = step
+        return condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            if cursor["o"] != self.ordering_key or len(cursor["p"]) != len(
+                self.ordering
+            ):
+                raise ValueError
+            return [
+                self.cursor_value(model, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, cursor["p"])
+            ]
+        except (
+            BinasciiError,
+            DjangoValidationError,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def cursor_value(self, model, field, value):
+        if field == self.rank_annotation:
+            return float(value)
+        return model._meta.get_field(field).to_python(value)
+
+    def encode_cursor(self, instance):
+        position = []
+        for field in self.ordering:
+            field = field.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[field]
+            else:
+                value = getattr(instance, field)
+            position.append(str(value))
+        cursor = json.dumps({"o": self.ordering_key, "p": position})
+        encoded = b64encode(cursor.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class AuthorPagination(KeysetPagination):
+    orderings = {"id": ("id",)}
+
+
+class BookPagination(KeysetPagination):
+    orderings = {
+        "id": ("id",),
+        "publication_date": ("publication_date", "id"),
+    }
@@ -0,0 +1,41 @@
+import codecs
+import json
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class ORJSONParser(JSONParser):
+    # DRF's JSONParser on orjson, which rejects NaN and Infinity like DRF's
+    # strict mode.
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if codecs.lookup(encoding).name != "utf-8":
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except (ValueError, UnicodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class NDJSONParser(BaseParser):
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number} - {exc}")
+        return items
@@ -0,0 +1,132 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# PostgreSQL: trigram GIN indexes serve the `icontains` filters, which Django
+# compiles to `UPPER(col::text) LIKE UPPER(...)`, and a GIN-indexed tsvector
+# column on books_book, kept up to date by triggers, serves `?q=`; both are
+# created by migrations 0003 and 0009. SQLite: an FTS5 table kept in sync by
+# triggers serves `?q=`. Both index one document per book, its name, genre
+# and author name, so the terms of a query may match any of them.
+
+SQLITE_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_book_fts "
+    "USING fts5(name, genre, author_name, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+SQLITE_TRIGGERS = {
+    "books_book_fts_insert": (
+        "CREATE TRIGGER IF NOT EXISTS books_book_fts_insert "
+        "AFTER INSERT ON books_book BEGIN "
+        "INSERT INTO books_book_fts(rowid, name, genre, author_name) "
+        "VALUES (new.id, new.name, new.genre, "
+        "(SELECT name FROM books_author WHERE id = new.author_id)); END"
+    ),
+    "books_book_fts_update": (
+        "CREATE TRIGGER IF NOT EXISTS books_book_fts_update "
+        "AFTER UPDATE OF name, genre, author_id ON books_book BEGIN "
+        "UPDATE books_book_fts SET name = new.name, genre = new.genre, "
+        "author_name = (SELECT name FROM books_author WHERE id = new.author_id) "
+        "WHERE rowid = old.id; END"
+    ),
+    "books_book_fts_delete": (
+        "CREATE TRIGGER IF NOT EXISTS books_book_fts_delete "
+        "AFTER DELETE ON books_book BEGIN "
+        "DELETE FROM books_book_fts WHERE rowid = old.id; END"
+    ),
+    "books_author_fts_update": (
+        "CREATE TRIGGER IF NOT EXISTS books_author_fts_update "
+        "AFTER UPDATE OF name ON books_author BEGIN "
+        "UPDATE books_book_fts SET author_name = new.name "
+        "WHERE rowid IN (SELECT id FROM books_book WHERE author_id = new.id); END"
+    ),
+}
+
+SQLITE_REBUILD = [
+    "DELETE FROM books_book_fts",
+    "INSERT INTO books_book_fts(rowid, name, genre, author_name) "
+    "SELECT b.id, b.name, b.genre, a.name "
+    "FROM books_book b JOIN books_author a ON a.id = b.author_id",
+]
+
+
+def install_search(connection):
+    # Idempotent. On SQLite the triggers are dropped before every migrate,
+    # because rebuilding a table they reference fails, and recreated after
+    # it, refilling the FTS table.
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND name LIKE 'books_%_fts_%'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing == set(SQLITE_TRIGGERS):
+            return
+        cursor.execute(SQLITE_TABLE)
+        for sql in SQLITE_TRIGGERS.values():
+            cursor.execute(sql)
+        for sql in SQLITE_REBUILD:
+            cursor.execute(sql)
+
+
+def drop_search_triggers(connection):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query)
+
+
+def search_books(queryset, query):
+    # Ranked prefix search over book name, genre and author name. The most
+    # relevant books come first.
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        matches = RawSQL(
+            "SELECT id FROM books_book "
+            "WHERE search_document @@ to_tsquery('simple'::regconfig, %s)",
+            (tsquery,),
+        )
+        rank = RawSQL(
+            "ts_rank(books_book.search_document, "
+            "to_tsquery('simple'::regconfig, %s))",
+            (tsquery,),
+        )
+    elif vendor == "sqlite":
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        matches = RawSQL(
+            "SELECT rowid FROM books_book_fts WHERE books_book_fts MATCH %s",
+            (match,),
+        )
+        rank = RawSQL(
+            "SELECT -bm25(books_book_fts) FROM books_book_fts "
+            "WHERE books_book_fts MATCH %s AND rowid = books_book.id",
+            (match,),
+        )
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(name__icontains=term)
+                | Q(genre__icontains=term)
+                | Q(author__name__icontains=term)
+            )
+        return queryset.filter(condition).order_by("id")
+
+    return (
+        queryset.filter(id__in=matches)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "id")
+    )
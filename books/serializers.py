@@ -1,42 +1,67 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
-from books.models import Author, Book
+from books.cache import invalidate_author_names
+from books.models import Author, Book, author_id_for_name, validate_name
 
 
 class AuthorSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Author
+        fields = ["id", "name", "book_count", "latest_publication_date"]
+
+
+class BookAuthorSerializer(AuthorSerializer):
+    # Books refer to existing authors by name, so no unique check here.
+    class Meta(AuthorSerializer.Meta):
         fields = ["id", "name"]
+        extra_kwargs = {"name": {"validators": [validate_name]}}
 
 
 class BookSerializer(serializers.HyperlinkedModelSerializer):
-    author = AuthorSerializer()
+    author = BookAuthorSerializer()
+
+    @staticmethod
+    def get_author(author_data):
+        author_id = author_id_for_name(author_data["name"])
+        return Author.from_db(None, ["id", "name"], [author_id, author_data["name"]])
+
+    def save_book(self, book, author_data=None, **kwargs):
+        try:
+            with transaction.atomic():
+                if author_data:
+                    book.author = self.get_author(author_data)
+                book.save(**kwargs)
+        except IntegrityError:
+            # The cached id belonged to an author deleted meanwhile.
+            invalidate_author_names()
+            if author_data:
+                book.author = self.get_author(author_data)
+            book.save(**kwargs)
+        return book
 
     def create(self, validated_data):
         author_data = validated_data.pop("author")
-        author = Author.objects.filter(name=author_data["name"]).first()
-        if not author:
-            author = Author.objects.create(name=author_data["name"])
-        book = Book.objects.create(author=author, **validated_data)
-        return book
+        return self.save_book(Book(**validated_data), author_data)
 
     def update(self, instance, validated_data):
-        instance.name = validated_data.get("name", instance.name)
-        instance.genre = validated_data.get("genre", instance.genre)
-        instance.publication_date = validated_data.get(
-            "publication_date", instance.publication_date
-        )
-        instance.save()
-
-        author_data = validated_data.get("author")
-        if author_data:
-            author = Author.objects.filter(name=author_data["name"]).first()
-            if not author:
-                author = Author.objects.create(name=author_data["name"])
-
-            instance.author = author
-            instance.save()
+        # One UPDATE of the changed columns only; nothing at all, not even
+        # post_save and its cache invalidation, when nothing changed.
+        author_data = validated_data.pop("author", None)
+        changed = []
+        for field, value in validated_data.items():
+            if getattr(instance, field) != value:
+                setattr(instance, field, value)
+                changed.append(field)
+        if author_data and author_data["name"] != instance.author.name:
+            changed.append("author")
+        else:
+            author_data = None
 
+        if changed:
+            self.save_book(
+                instance, author_data, update_fields=[*changed, "updated_at"]
+            )
         return instance
 
     class Meta:
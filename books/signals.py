@@ -0,0 +1,96 @@
+from collections import Counter
+
+from django.db import connections
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_migrate,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .cache import invalidate_author_names, invalidate_authors, invalidate_books
+from .models import Author, Book, record_book_changes
+from .search import drop_search_triggers, install_search
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def book_invalidate_cache(sender, instance, using, **kwargs):
+    invalidate_books([instance.pk], using=using)
+
+
+@receiver(pre_save, sender=Book)
+def book_values_before_save(sender, instance, raw, **kwargs):
+    old = getattr(instance, "_loaded_values", None)
+    if old is None and instance.pk is not None:
+        # Not loaded from the database (or by loaddata): the row may exist.
+        row = (
+            Book.objects.using(kwargs["using"])
+            .filter(pk=instance.pk)
+            .only(*Book.tracked_fields)
+            .first()
+        )
+        old = row and row.tracked_values()
+    instance._old_values = old
+
+
+@receiver(post_save, sender=Book)
+def book_count_after_save(sender, instance, raw, **kwargs):
+    old, new = instance._old_values, instance.tracked_values()
+    instance._loaded_values = new
+    if old == new:
+        return
+    facets = Counter(Book.facet_keys(new))
+    authors = {new[2]}
+    if old:
+        facets.subtract(Book.facet_keys(old))
+        authors.add(old[2])
+        if old[1:] == new[1:]:
+            # Only the genre changed.
+            authors = set()
+    if raw:
+        # Fixtures keep their authors' timestamps.
+        record_book_changes(facets)
+        Author.objects.refresh_stats(authors, touch=False)
+    else:
+        record_book_changes(facets, authors)
+
+
+@receiver(post_delete, sender=Book)
+def book_count_after_delete(sender, instance, **kwargs):
+    values = getattr(instance, "_loaded_values", None) or instance.tracked_values()
+    record_book_changes(
+        Counter({key: -1 for key in Book.facet_keys(values)}), {values[2]}
+    )
+
+
+@receiver(post_save, sender=Author)
+def author_invalidate_cache(sender, instance, created, using, **kwargs):
+    book_pks = ()
+    if not created:
+        invalidate_author_names(using=using)
+        book_pks = Book.objects.filter(author=instance).values_list("pk", flat=True)
+    invalidate_authors([instance.pk], book_pks, using=using)
+
+
+@receiver(post_delete, sender=Author)
+def author_delete_invalidate_cache(sender, instance, using, **kwargs):
+    # Cascaded books send their own post_delete.
+    invalidate_author_names(using=using)
+    invalidate_authors([instance.pk], using=using)
+
+
+@receiver(pre_migrate)
+def search_drop_triggers(sender, app_config, using, **kwargs):
+    if app_config.label == "books":
+        drop_search_triggers(connections[using])
+
+
+@receiver(post_migrate)
+def search_install(sender, app_config, using, **kwargs):
+    if app_config.label == "books":
+        install_search(connections[using])
+        # Also sent after flush, which leaves cached author ids dangling.
+        invalidate_author_names(using=using)
@@ -0,0 +1,23 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+DUMMY_CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def assert_constant_queries(view, populate, expected, sizes=(1, 10, 50), url="/"):
+    # Runs `view` after `populate(size)` for every size and checks that the
+    # number of queries does not depend on how many rows are returned.
+    factory = APIRequestFactory()
+    with override_settings(CACHES=DUMMY_CACHES):
+        for size in sizes:
+            populate(size)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(factory.get(url))
+                response.render()
+            assert response.status_code == 200, response.content
+            assert len(queries) == expected, (
+                f"{len(queries)} queries for {size} rows, expected {expected}:\n"
+                + "\n".join(query["sql"] for query in queries.captured_queries)
+            )
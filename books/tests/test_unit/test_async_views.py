@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+import pytest
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from books.models import Book
+
+
+@pytest.mark.django_db
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    async def assert_same_response(self, path):
+        sync = await self.async_client.get(f"/api/{path}")
+        response = await self.async_client.get(f"/api/async/{path}")
+        assert response.status_code == sync.status_code
+        assert response["Content-Type"] == sync["Content-Type"]
+        # Only the next links differ, by their path.
+        content = response.content.replace(b"/api/async/", b"/api/")
+        assert content == sync.content
+        return response
+
+    async def test_get_book_list(self):
+        response = await self.assert_same_response("books/")
+        assert len(json.loads(response.content)) == 2
+
+    async def test_get_book_list_filtered(self):
+        await self.assert_same_response("books/?name=harry&genre=fantasy")
+        await self.assert_same_response("books/?author=1")
+        await self.assert_same_response("books/?publication_date__day=40")
+
+    async def test_get_book_pages(self):
+        response = await self.assert_same_response("books/?page_size=1")
+        cursor = json.loads(response.content)["next"].split("cursor=")[1]
+        await self.assert_same_response(f"books/?page_size=1&cursor={cursor}")
+        await self.assert_same_response("books/?cursor=incorrect")
+
+    async def test_get_book_detail(self):
+        await self.assert_same_response("books/1")
+        await self.assert_same_response("books/999")
+
+    async def test_get_authors(self):
+        await self.assert_same_response("authors/")
+        await self.assert_same_response("authors/?page_size=1")
+        await self.assert_same_response("authors/2")
+
+    async def test_get_book_detail_not_modified(self):
+        response = await self.async_client.get("/api/async/books/1")
+        assert response["ETag"]
+        response = await self.async_client.get(
+            "/api/async/books/1", headers={"If-None-Match": response["ETag"]}
+        )
+        assert response.status_code == 304
+
+    async def test_create_book(self):
+        data = {
+            "name": "Async Book",
+            "author": {"name": "Leonardo"},
+            "genre": "fantasy",
+            "publication_date": "2020-10-10",
+        }
+        response = await self.async_client.post(
+            "/api/async/books/", data, content_type="application/json"
+        )
+        assert response.status_code == 201
+        created = json.loads(response.content)
+        book = await Book.objects.select_related("author").aget(pk=created["id"])
+        assert created == {
+            "id": book.pk,
+            "name": "Async Book",
+            "author": {"id": 1, "name": "Leonardo"},
+            "genre": "fantasy",
+            "publication_date": "2020-10-10",
+        }
+        assert book.author.name == "Leonardo"
+
+        response = await self.async_client.get(f"/api/async/books/{book.pk}")
+        assert json.loads(response.content) == created
+
+    async def test_create_book_invalid(self):
+        response = await self.async_client.post(
+            "/api/async/books/", {"name": "x"}, content_type="application/json"
+        )
+        assert response.status_code == 400
+        assert "author" in json.loads(response.content)
+
+
+class TestASGIMiddleware(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_stays_async(self):
+        # Django logs every sync middleware it wraps in async_to_sync.
+        with mock.patch("django.core.handlers.base.logger") as logger:
+            ASGIHandler()
+        adapted = [
+            call.args[1]
+            for call in logger.debug.call_args_list
+            if "adapted" in call.args[0]
+        ]
+        assert adapted == []
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from books.cache import get_versions
+from books.models import Author, author_id_for_name
+from books.views import AuthorList, BookList
+
+
+@pytest.mark.django_db
+class TestAuthorUpsert(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def post_book(author_name):
+        factory = APIRequestFactory()
+        request = factory.post(
+            "/",
+            {
+                "author": {"name": author_name},
+                "genre": "horror",
+                "name": "Upserted",
+                "publication_date": "2020-10-10",
+            },
+            format="json",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = BookList.as_view()(request)
+            response.render()
+        assert response.status_code == 201
+        author_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'INTO "books_author"' in query["sql"]
+            or 'FROM "books_author"' in query["sql"]
+        ]
+        return json.loads(response.content), author_queries
+
+    def test_post_book_existing_author(self):
+        book, author_queries = self.post_book("Leonardo")
+        assert book["author"] == {"id": 1, "name": "Leonardo"}
+        # Existing authors are read, not upserted.
+        assert len(author_queries) == 1
+        assert "ON CONFLICT" not in author_queries[0]
+        assert Author.objects.filter(name="Leonardo").count() == 1
+
+    def test_post_book_new_author(self):
+        book, author_queries = self.post_book("New Author")
+        assert book["author"] == {"id": 3, "name": "New Author"}
+        assert len(author_queries) == 2
+        assert "ON CONFLICT" in author_queries[1]
+
+    def test_post_book_cached_author(self):
+        self.post_book("Leonardo")
+        book, author_queries = self.post_book("Leonardo")
+        assert book["author"] == {"id": 1, "name": "Leonardo"}
+        assert author_queries == []
+
+    def test_author_rename_clears_cache(self):
+        self.post_book("Leonardo")
+        author = Author.objects.get(pk=1)
+        author.name = "Donatello"
+        author.save()
+        book, _ = self.post_book("Leonardo")
+        assert book["author"]["id"] == Author.objects.get(name="Leonardo").pk
+        assert book["author"]["id"] != 1
+
+    def test_author_renamed_elsewhere(self):
+        self.post_book("Leonardo")
+        # Another process renames the author; the shared cache follows.
+        Author.objects.filter(pk=1).update(name="Donatello")
+        book, _ = self.post_book("Leonardo")
+        assert book["author"]["id"] != 1
+        assert Author.objects.get(pk=1).name == "Donatello"
+
+    def test_upsert_returns_existing_id(self):
+        authors = Author.objects.upsert([Author(name="Jhon Smit"), Author(name="Ann")])
+        ann = Author.objects.get(name="Ann")
+        assert [author.pk for author in authors] == [2, ann.pk]
+        assert author_id_for_name("Ann") == ann.pk
+
+    def test_upsert_invalidates_only_for_new_authors(self):
+        versions = get_versions(["authors", "author:2"])
+        Author.objects.upsert([Author(name="Jhon Smit")])
+        assert get_versions(["authors", "author:2"]) == versions
+        Author.objects.upsert([Author(name="Jhon Smit"), Author(name="Ann")])
+        after = get_versions(["authors", "author:2"])
+        assert after[0] != versions[0]
+        assert after[1] == versions[1]
+
+    def test_post_author_duplicate_name(self):
+        factory = APIRequestFactory()
+        request = factory.post("/", {"name": "Leonardo"})
+        response = AuthorList.as_view()(request)
+        response.render()
+        assert response.status_code == 400
+        assert json.loads(response.content) == {
+            "name": ["author with this name already exists."]
+        }
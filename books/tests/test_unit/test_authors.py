@@ -1,11 +1,13 @@
 import json
+from datetime import date
+from io import StringIO
 
 import pytest
 from django.core.management import call_command
 from django.test import TestCase
 from rest_framework.test import APIRequestFactory
 
-from books.models import Author
+from books.models import Author, Book
 from books.views import AuthorList, AuthorDetail
 
 
@@ -22,8 +24,18 @@ class TestAuthor(TestCase):
         response.render()
         assert response.status_code == 200
         assert json.loads(response.content) == [
-            {"id": 1, "name": "Leonardo"},
-            {"id": 2, "name": "Jhon Smit"},
+            {
+                "id": 1,
+                "name": "Leonardo",
+                "book_count": 1,
+                "latest_publication_date": "2012-12-12",
+            },
+            {
+                "id": 2,
+                "name": "Jhon Smit",
+                "book_count": 1,
+                "latest_publication_date": "2020-12-12",
+            },
         ]
 
     def test_get_author_empty(self):
@@ -42,7 +54,14 @@ class TestAuthor(TestCase):
         response = AuthorList.as_view()(request)
         response.render()
         assert response.status_code == 200
-        assert json.loads(response.content) == [{"id": 1, "name": "Leonardo"}]
+        assert json.loads(response.content) == [
+            {
+                "id": 1,
+                "name": "Leonardo",
+                "book_count": 1,
+                "latest_publication_date": "2012-12-12",
+            }
+        ]
 
     def test_get_author_incorrect_filter_name(self):
         factory = APIRequestFactory()
@@ -58,7 +77,12 @@ class TestAuthor(TestCase):
         response = AuthorDetail.as_view()(request, pk=1)
         response.render()
         assert response.status_code == 200
-        assert json.loads(response.content) == {"id": 1, "name": "Leonardo"}
+        assert json.loads(response.content) == {
+            "id": 1,
+            "name": "Leonardo",
+            "book_count": 1,
+            "latest_publication_date": "2012-12-12",
+        }
 
     def test_get_author_incorrect_id(self):
         factory = APIRequestFactory()
@@ -74,7 +98,12 @@ class TestAuthor(TestCase):
         response = AuthorList.as_view()(request)
         response.render()
         assert response.status_code == 201
-        assert json.loads(response.content) == {"id": 3, "name": "New Leonardo"}
+        assert json.loads(response.content) == {
+            "id": 3,
+            "name": "New Leonardo",
+            "book_count": 0,
+            "latest_publication_date": None,
+        }
 
     def test_post_author_incorrect_add(self):
         factory = APIRequestFactory()
@@ -93,3 +122,58 @@ class TestAuthor(TestCase):
         response.render()
         assert response.status_code == 400
         assert json.loads(response.content) == {"name": ["Value is too short."]}
+
+    @staticmethod
+    def stats(pk):
+        return Author.objects.values_list("book_count", "latest_publication_date").get(
+            pk=pk
+        )
+
+    def test_book_writes_update_author_stats(self):
+        book = Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2019-01-01",
+        )
+        assert self.stats(1) == (2, date(2019, 1, 1))
+
+        book.author_id = 2
+        book.save()
+        assert self.stats(1) == (1, date(2012, 12, 12))
+        assert self.stats(2) == (2, date(2020, 12, 12))
+
+        Book.objects.filter(author_id=2).update(publication_date="2021-03-03")
+        assert self.stats(2) == (2, date(2021, 3, 3))
+
+        Book.objects.filter(author_id=2).delete()
+        assert self.stats(2) == (0, None)
+
+        Book.objects.bulk_create(
+            [
+                Book(name="Blue", author_id=2, genre="drama", publication_date=day)
+                for day in ["2001-01-01", "2002-02-02"]
+            ]
+        )
+        assert self.stats(2) == (2, date(2002, 2, 2))
+
+    def test_book_write_invalidates_author(self):
+        factory = APIRequestFactory()
+        AuthorDetail.as_view()(factory.get("/"), pk=1).render()
+        Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2019-01-01",
+        )
+        response = AuthorDetail.as_view()(factory.get("/"), pk=1)
+        response.render()
+        assert json.loads(response.content)["book_count"] == 2
+
+    def test_rebuild_author_stats(self):
+        Author.objects.update(book_count=0, latest_publication_date=None)
+        out = StringIO()
+        call_command("rebuild_author_stats", stdout=out)
+        assert self.stats(1) == (1, date(2012, 12, 12))
+        assert self.stats(2) == (1, date(2020, 12, 12))
+        assert "2 authors recounted" in out.getvalue()
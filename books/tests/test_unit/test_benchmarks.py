@@ -0,0 +1,110 @@
+import os
+import tempfile
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from books.benchmarks import (
+    CONCURRENCY_SCENARIOS,
+    SCENARIOS,
+    STACKS,
+    compare,
+    percentile,
+    run_benchmarks,
+    run_concurrency_benchmarks,
+    run_row_benchmark,
+)
+from books.management.commands.bench_api import Command as BenchCommand
+from books.testing import DUMMY_CACHES
+
+
+@pytest.mark.django_db
+@override_settings(CACHES=DUMMY_CACHES)
+class TestBenchmarks(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 99) == 7
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(iterations=3, warmup=1)
+        assert set(results) == {scenario.name for scenario in SCENARIOS}
+        for name, result in results.items():
+            assert result["status"] in (200, 201), name
+            assert result["iterations"] == 3
+            assert result["queries"] >= 1
+            assert result["p50_ms"] <= result["p99_ms"]
+            assert result["throughput_rps"] > 0
+        assert results["book_list"]["queries"] == 1
+
+    def test_run_row_benchmark(self):
+        result = run_row_benchmark(rows=10, repeat=2)
+        assert result["rows"] == 2
+        assert result["serializer_us_per_row"] > 0
+        assert result["values_us_per_row"] > 0
+
+    def test_compare(self):
+        changes = compare(
+            {"book_list": {"p50_ms": 3.0}, "book_detail": {"p50_ms": 1.0}},
+            {"book_list": {"p50_ms": 2.0}},
+        )
+        assert changes == {"book_list": 50.0}
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(CACHES=DUMMY_CACHES)
+class TestConcurrencyBenchmarks(TransactionTestCase):
+    # Requests run on other threads, which only see committed rows.
+    def setUp(self):
+        call_command("loaddata", "test_books.json")
+
+    def test_run_concurrency_benchmarks(self):
+        results = run_concurrency_benchmarks([1, 4], requests=8)
+        assert set(results) == set(CONCURRENCY_SCENARIOS)
+        for stacks in results.values():
+            assert set(stacks) == set(STACKS)
+            for levels in stacks.values():
+                assert [result["concurrency"] for result in levels] == [1, 4]
+                for result in levels:
+                    assert result["status"] == 200
+                    assert result["requests"] == 8
+
+
+class TestBenchCommand(TestCase):
+    def test_own_cache(self):
+        # The throwaway database's rows never reach the configured cache.
+        def run(command, options):
+            cache.set("bench-key", "throwaway")
+            assert cache.get("bench-key") == "throwaway"
+            return (
+                {},
+                {"serializer_us_per_row": 1, "values_us_per_row": 1, "speedup": 1},
+                {},
+            )
+
+        cache.delete("bench-key")
+        command = "books.management.commands.bench_api"
+        creation = "django.db.backends.base.creation.BaseDatabaseCreation"
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            BenchCommand, "run", run
+        ), mock.patch(f"{command}.setup_test_environment"), mock.patch(
+            f"{command}.teardown_test_environment"
+        ), mock.patch(
+            f"{creation}.create_test_db"
+        ), mock.patch(
+            f"{creation}.destroy_test_db"
+        ):
+            call_command(
+                "bench_api",
+                output=os.path.join(directory, "out.json"),
+                stdout=mock.Mock(),
+            )
+        assert cache.get("bench-key") is None
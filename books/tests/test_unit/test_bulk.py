@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from books.models import Author, Book
+from books.views import BookBulk
+
+
+@pytest.mark.django_db
+class TestBulk(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def book(name, author):
+        return {
+            "author": {"name": author},
+            "genre": "horror",
+            "name": name,
+            "publication_date": "2020-10-10",
+        }
+
+    def test_post_bulk_json(self):
+        factory = APIRequestFactory()
+        items = [self.book(f"Book {i}", f"Author {i % 3}") for i in range(30)]
+        items.append(self.book("Leo book", "Leonardo"))
+        request = factory.post("/", items, format="json")
+        with CaptureQueriesContext(connection) as queries:
+            response = BookBulk.as_view()(request)
+            response.render()
+        assert response.status_code == 201
+        results = json.loads(response.content)
+        assert len(results) == 31
+        assert all(result["status"] == 201 for result in results)
+        assert Author.objects.count() == 5
+        assert Book.objects.get(pk=results[-1]["id"]).author_id == 1
+        assert len(queries) < 10
+
+    def test_post_bulk_ndjson(self):
+        factory = APIRequestFactory()
+        body = "\n".join(
+            json.dumps(self.book(f"Book {i}", "Leonardo")) for i in range(3)
+        )
+        request = factory.post("/", body, content_type="application/x-ndjson")
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 201
+        assert Book.objects.filter(author_id=1).count() == 4
+
+    def test_post_bulk_ndjson_incorrect_line(self):
+        factory = APIRequestFactory()
+        body = json.dumps(self.book("Book", "Leonardo")) + "\n{"
+        request = factory.post("/", body, content_type="application/x-ndjson")
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 400
+        assert "line 2" in json.loads(response.content)["detail"]
+
+    def test_post_bulk_partial_errors(self):
+        factory = APIRequestFactory()
+        items = [self.book("Good", "Leonardo"), self.book("N", "Leonardo")]
+        request = factory.post("/", items, format="json")
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 207
+        assert json.loads(response.content) == [
+            {"status": 201, "id": 3},
+            {"status": 400, "errors": {"name": ["Value is too short."]}},
+        ]
+        assert Book.objects.count() == 3
+
+    def test_post_bulk_not_list(self):
+        factory = APIRequestFactory()
+        request = factory.post("/", self.book("Book", "Leo"), format="json")
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 400
+
+    def test_patch_bulk(self):
+        factory = APIRequestFactory()
+        items = [
+            {"id": 1, "genre": "Drama"},
+            {"id": 2, "author": {"name": "New Author"}},
+            {"id": 5, "genre": "Drama"},
+        ]
+        request = factory.patch("/", items, format="json")
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 207
+        assert json.loads(response.content) == [
+            {"status": 200, "id": 1},
+            {"status": 200, "id": 2},
+            {"status": 404, "errors": {"detail": "Not found."}},
+        ]
+        assert Book.objects.get(pk=1).genre == "Drama"
+        assert Book.objects.get(pk=2).author.name == "New Author"
+        assert Book.objects.get(pk=2).genre == "Comedy"
+
+    def test_delete_bulk(self):
+        factory = APIRequestFactory()
+        request = factory.delete("/", [1, 2], format="json")
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 200
+        assert json.loads(response.content) == [
+            {"status": 204, "id": 1},
+            {"status": 204, "id": 2},
+        ]
+        assert not Book.objects.exists()
+
+    def test_delete_bulk_invalid_items(self):
+        factory = APIRequestFactory()
+        request = factory.delete(
+            "/", [1, {"id": 2}, "x", None, True, "2", 5], format="json"
+        )
+        response = BookBulk.as_view()(request)
+        response.render()
+        assert response.status_code == 207
+        invalid = {"status": 400, "errors": ["A valid integer is required."]}
+        assert json.loads(response.content) == [
+            {"status": 204, "id": 1},
+            invalid,
+            invalid,
+            {"status": 400, "errors": ["This field may not be null."]},
+            invalid,
+            {"status": 204, "id": 2},
+            {"status": 404, "errors": {"detail": "Not found."}},
+        ]
+        assert not Book.objects.exists()
@@ -0,0 +1,182 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIRequestFactory
+
+from books.models import Author, AuthorQuerySet, Book
+from books.views import AuthorDetail, AuthorList, BookDetail, BookList
+
+
+@pytest.mark.django_db
+class TestCache(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def count_queries(view, **kwargs):
+        factory = APIRequestFactory()
+        with CaptureQueriesContext(connection) as queries:
+            response = view(factory.get("/"), **kwargs)
+            response.render()
+        assert response.status_code == 200
+        return len(queries)
+
+    def warm_up(self):
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 1
+        assert self.count_queries(AuthorList.as_view()) == 1
+        assert self.count_queries(AuthorDetail.as_view(), pk=1) == 1
+        assert self.count_queries(AuthorDetail.as_view(), pk=2) == 1
+
+    def test_get_cached(self):
+        self.warm_up()
+        assert self.count_queries(BookList.as_view()) == 0
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 0
+        assert self.count_queries(AuthorList.as_view()) == 0
+        assert self.count_queries(AuthorDetail.as_view(), pk=1) == 0
+
+    def test_book_save_invalidates_only_its_entries(self):
+        self.warm_up()
+        book = Book.objects.get(pk=1)
+        book.name = "Blue Book"
+        book.save()
+
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 0
+        assert self.count_queries(AuthorList.as_view()) == 0
+        assert self.count_queries(AuthorDetail.as_view(), pk=1) == 0
+
+    def test_author_save_invalidates_books_of_author(self):
+        self.warm_up()
+        author = Author.objects.get(pk=1)
+        author.name = "Leo"
+        author.save()
+
+        assert self.count_queries(AuthorList.as_view()) == 1
+        assert self.count_queries(AuthorDetail.as_view(), pk=1) == 1
+        assert self.count_queries(AuthorDetail.as_view(), pk=2) == 0
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 0
+
+    def test_save_keeps_other_cache_keys(self):
+        cache.set("other:key", "value")
+        Book.objects.filter(pk=1).first().save()
+        assert cache.get("other:key") == "value"
+
+    def test_book_delete_invalidates_entries(self):
+        self.warm_up()
+        factory = APIRequestFactory()
+        response = BookDetail.as_view()(factory.delete("/"), pk=1)
+        assert response.status_code == 204
+
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 0
+        response = BookDetail.as_view()(factory.get("/"), pk=1)
+        assert response.status_code == 404
+
+    def test_author_delete_cascade_invalidates_books(self):
+        self.warm_up()
+        Author.objects.filter(pk=1).delete()
+
+        assert self.count_queries(AuthorList.as_view()) == 1
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(AuthorDetail.as_view(), pk=2) == 0
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 0
+        factory = APIRequestFactory()
+        response = BookDetail.as_view()(factory.get("/"), pk=1)
+        assert response.status_code == 404
+
+    def test_queryset_update_invalidates_entries(self):
+        self.warm_up()
+        Book.objects.filter(pk=2).update(genre="Drama")
+
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 0
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 1
+
+    def test_author_queryset_update_invalidates_books(self):
+        self.warm_up()
+        Author.objects.filter(pk=2).update(name="John Smith")
+
+        assert self.count_queries(AuthorDetail.as_view(), pk=1) == 0
+        assert self.count_queries(AuthorDetail.as_view(), pk=2) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 0
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 1
+
+    def test_author_queryset_update_in_batches(self):
+        self.warm_up()
+        with mock.patch.object(AuthorQuerySet, "lookup_batch_size", 1):
+            with CaptureQueriesContext(connection) as queries:
+                rows = Author.objects.filter(pk__gt=0).update(updated_at=now())
+        assert rows == 2
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 2
+
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 1
+
+    def test_bulk_create_invalidates_list(self):
+        self.warm_up()
+        Book.objects.bulk_create(
+            [
+                Book(
+                    name="Bulk Book",
+                    author_id=1,
+                    genre="horror",
+                    publication_date="2020-10-10",
+                )
+            ]
+        )
+
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=1) == 0
+
+    def test_transaction_invalidates_again_after_commit(self):
+        self.warm_up()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                book = Book.objects.get(pk=1)
+                book.name = "Blue Book"
+                book.save()
+                # Before COMMIT other connections still read the old rows,
+                # which would be cached under this version.
+                assert self.count_queries(BookList.as_view()) == 1
+                assert self.count_queries(BookList.as_view()) == 0
+
+        assert self.count_queries(BookList.as_view()) == 1
+        assert self.count_queries(BookDetail.as_view(), pk=2) == 0
+
+    @override_settings(DATABASE_REPLICAS=["default"], REPLICA_PIN_SECONDS=60)
+    def test_replica_reads_not_cached_after_write(self):
+        def get(**extra):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/api/books/", **extra)
+            return response, len(queries)
+
+        Book.objects.filter(pk=1).update(name="Blue Book")
+        # A replica may not have the write yet.
+        response, queries = get()
+        assert queries == 1
+        assert not response.has_header("ETag")
+        assert get()[1] == 1
+
+        # The primary has it, so a pinned client caches it for everyone.
+        response, queries = get(HTTP_COOKIE="db_primary=1")
+        assert queries == 1
+        assert response.has_header("ETag")
+        assert get()[1] == 0
+
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            Book.objects.filter(pk=1).update(name="Red Book")
+            get()
+            assert get()[1] == 0
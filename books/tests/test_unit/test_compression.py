@@ -0,0 +1,200 @@
+import gzip
+import json
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from books.models import Author, Book
+from core import compression
+from core.compression import compress_response, encoded_etag, negotiate
+from core.middleware import CompressionMiddleware
+
+
+class TestNegotiate(SimpleTestCase):
+    def test_negotiate(self):
+        assert negotiate("") is None
+        assert negotiate("gzip") == "gzip"
+        assert negotiate("deflate, gzip;q=0.5") == "gzip"
+        assert negotiate("gzip;q=0") is None
+        assert negotiate("identity") is None
+        assert negotiate("*") == next(iter(compression.COMPRESSORS))
+        assert negotiate("*, gzip;q=0") in (None, "br", "zstd")
+
+    @mock.patch.dict(
+        compression.COMPRESSORS,
+        {"br": None, "zstd": None, "gzip": None},
+        clear=True,
+    )
+    def test_negotiate_preference(self):
+        assert negotiate("gzip, zstd, br") == "br"
+        assert negotiate("gzip, zstd;q=0.9, br;q=0.8") == "gzip"
+        assert negotiate("gzip;q=0.5, zstd") == "zstd"
+
+    def test_encoded_etag(self):
+        assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+        assert encoded_etag('W/"abc"', "gzip") == 'W/"abc"'
+        assert encoded_etag('"abc"', None) == '"abc"'
+
+
+class TestCompressResponse(SimpleTestCase):
+    content = json.dumps([{"id": i, "name": "Book"} for i in range(50)]).encode()
+
+    def test_compress(self):
+        response = HttpResponse(self.content)
+        assert compress_response(response, "gzip")
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Vary"] == "Accept-Encoding"
+        assert gzip.decompress(response.content) == self.content
+        assert response["Content-Length"] == str(len(response.content))
+
+    def test_compress_deterministic(self):
+        first, second = HttpResponse(self.content), HttpResponse(self.content)
+        compress_response(first, "gzip")
+        compress_response(second, "gzip")
+        assert first.content == second.content
+
+    def test_small_response(self):
+        response = HttpResponse(b"{}")
+        assert not compress_response(response, "gzip")
+        assert response.content == b"{}"
+        assert response["Vary"] == "Accept-Encoding"
+
+    def test_encoded_response(self):
+        response = HttpResponse(self.content, headers={"Content-Encoding": "br"})
+        assert not compress_response(response, "gzip")
+        assert response.content == self.content
+
+    def test_streaming(self):
+        response = StreamingHttpResponse(iter([self.content[:100], self.content[100:]]))
+        assert compress_response(response, "gzip")
+        assert gzip.decompress(b"".join(response.streaming_content)) == self.content
+
+    def test_async_streaming(self):
+        async def chunks():
+            yield self.content[:100]
+            yield self.content[100:]
+
+        async def consume(response):
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        response = StreamingHttpResponse(chunks())
+        assert compress_response(response, "gzip")
+        assert "Content-Length" not in response
+        assert gzip.decompress(async_to_sync(consume)(response)) == self.content
+
+    @pytest.mark.skipif(compression.brotli is None, reason="brotli not installed")
+    def test_brotli(self):
+        response = HttpResponse(self.content)
+        assert compress_response(response, "br")
+        assert compression.brotli.decompress(response.content) == self.content
+
+    @pytest.mark.skipif(compression.zstandard is None, reason="zstd not installed")
+    def test_zstd(self):
+        response = HttpResponse(self.content)
+        assert compress_response(response, "zstd")
+        decompressor = compression.zstandard.ZstdDecompressor()
+        assert decompressor.decompressobj().decompress(response.content) == (
+            self.content
+        )
+
+
+@pytest.mark.django_db
+class TestCompressedCache(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        author = Author.objects.get(pk=1)
+        Book.objects.bulk_create(
+            Book(
+                name=f"Compressed {i}",
+                author=author,
+                genre="horror",
+                publication_date="2015-01-01",
+            )
+            for i in range(20)
+        )
+
+    def get(self, path, encoding="gzip", **headers):
+        return self.client.get(path, headers={"Accept-Encoding": encoding, **headers})
+
+    def test_book_list_compressed(self):
+        raw = self.get("/api/books/", encoding="")
+        assert "Content-Encoding" not in raw
+        response = self.get("/api/books/")
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == raw.content
+        assert response["ETag"] == raw["ETag"][:-1] + '-gzip"'
+        assert "Accept-Encoding" in response["Vary"]
+
+    def test_cache_hit_not_recompressed(self):
+        first = self.get("/api/books/")
+        with mock.patch("books.cache.compress_response") as compress:
+            response = self.get("/api/books/")
+        compress.assert_not_called()
+        assert response.content == first.content
+        assert response["Content-Encoding"] == "gzip"
+
+    def test_encoded_entry_added_on_hit(self):
+        raw = self.get("/api/books/", encoding="")
+        response = self.get("/api/books/")
+        assert gzip.decompress(response.content) == raw.content
+        with mock.patch("books.cache.compress_response") as compress:
+            self.get("/api/books/")
+        compress.assert_not_called()
+
+    def test_not_modified_per_encoding(self):
+        response = self.get("/api/books/")
+        etag = response["ETag"]
+        assert self.get("/api/books/", **{"If-None-Match": etag}).status_code == 304
+        response = self.get("/api/books/", encoding="", **{"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_uncached_response_compressed(self):
+        response = self.get("/api/books/?ids=1,2")
+        assert response["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(response.content))) == 2
+
+    def test_streaming_response_compressed(self):
+        response = self.get("/api/books/?format=ndjson")
+        assert response["Content-Encoding"] == "gzip"
+        content = gzip.decompress(b"".join(response.streaming_content))
+        assert len(content.splitlines()) == 22
+
+    def test_file_response_not_compressed(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = FileResponse(BytesIO(TestCompressResponse.content))
+        middleware = CompressionMiddleware(lambda request: response)
+        assert middleware(request) is response
+        assert "Content-Encoding" not in response
+        assert b"".join(response.streaming_content) == TestCompressResponse.content
+
+    @override_settings(
+        STORAGES={
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+    )
+    def test_page_with_csrf_token_not_compressed(self):
+        for _ in range(2):
+            response = self.get("/api/books/", Accept="text/html")
+            assert response["Content-Type"].startswith("text/html")
+            assert b"csrfmiddlewaretoken" in response.content
+            assert "Content-Encoding" not in response
+            assert not response.has_header("ETag")
+
+    def test_async_view_compressed(self):
+        raw = self.get("/api/async/books/", encoding="")
+        response = self.get("/api/async/books/")
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == raw.content
+        with mock.patch("books.cache.compress_response") as compress:
+            assert self.get("/api/async/books/").content == response.content
+        compress.assert_not_called()
@@ -0,0 +1,77 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from books.cache import GLOBAL_TAG, TAG_PREFIX
+from books.models import Author, Book
+from books.views import AuthorDetail, BookDetail, BookList
+
+
+@pytest.mark.django_db
+class TestConditional(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def get(view, headers=None, **kwargs):
+        factory = APIRequestFactory()
+        request = factory.get("/", **(headers or {}))
+        response = view(request, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_get_book_list_etag(self):
+        response = self.get(BookList.as_view())
+        assert response.status_code == 200
+        assert response["ETag"]
+        assert response["Last-Modified"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(
+                BookList.as_view(), {"HTTP_IF_NONE_MATCH": response["ETag"]}
+            )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert len(queries) == 0
+
+    def test_get_book_list_etag_changed(self):
+        etag = self.get(BookList.as_view())["ETag"]
+        Book.objects.filter(pk=2).update(genre="Drama")
+        response = self.get(BookList.as_view(), {"HTTP_IF_NONE_MATCH": etag})
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_get_book_list_etag_depends_on_filters(self):
+        factory = APIRequestFactory()
+        first = BookList.as_view()(factory.get("/"))
+        filtered = BookList.as_view()(factory.get("/", {"genre": "horror"}))
+        assert first["ETag"] != filtered["ETag"]
+
+    def test_get_book_if_modified_since(self):
+        response = self.get(BookDetail.as_view(), pk=1)
+        response = self.get(
+            BookDetail.as_view(),
+            {"HTTP_IF_MODIFIED_SINCE": response["Last-Modified"]},
+            pk=1,
+        )
+        assert response.status_code == 304
+
+    def test_get_author_etag_changed_after_save(self):
+        etag = self.get(AuthorDetail.as_view(), pk=1)["ETag"]
+        author = Author.objects.get(pk=1)
+        author.name = "Leo"
+        author.save()
+        response = self.get(AuthorDetail.as_view(), {"HTTP_IF_NONE_MATCH": etag}, pk=1)
+        assert response.status_code == 200
+
+    def test_get_book_last_modified_seeded_from_row(self):
+        cache.set(TAG_PREFIX + GLOBAL_TAG, 0, None)
+        cache.delete(TAG_PREFIX + "book:1")
+        response = self.get(BookDetail.as_view(), pk=1)
+        assert response["Last-Modified"] == "Sun, 17 Dec 2023 14:33:00 GMT"
@@ -0,0 +1,36 @@
+import json
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+
+@pytest.mark.django_db
+class TestDatabaseStats(TestCase):
+    def test_database_stats(self):
+        response = self.client.get("/stats/db/")
+        assert response.status_code == 200
+        stats = json.loads(response.content)
+        assert stats["default"]["vendor"] == connection.vendor
+        assert "conn_max_age" in stats["default"]
+
+    def test_database_stats_from_backend(self):
+        pool_stats = {"pool_size": 4, "pool_available": 1, "requests_wait_ms": 12}
+        with mock.patch.object(
+            connection, "get_stats", return_value=pool_stats, create=True
+        ):
+            response = self.client.get("/stats/db/")
+        stats = json.loads(response.content)
+        assert stats["default"]["pool_size"] == 4
+        assert stats["default"]["requests_wait_ms"] == 12
+
+    def test_database_stats_internal_only(self):
+        # The test client connects from 127.0.0.1, allowed by default.
+        remote = {"REMOTE_ADDR": "203.0.113.7"}
+        assert self.client.get("/stats/db/", **remote).status_code == 403
+        with override_settings(INTERNAL_STATS_IPS=["203.0.113.7"]):
+            assert self.client.get("/stats/db/", **remote).status_code == 200
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        assert self.client.get("/stats/db/", **remote).status_code == 200
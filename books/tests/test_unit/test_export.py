@@ -0,0 +1,95 @@
+import json
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from books.models import Book
+from books.renderers import NDJSONRenderer
+from books.views import BookList
+
+
+@pytest.mark.django_db
+class TestExport(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def export(params):
+        factory = APIRequestFactory()
+        request = factory.get("/", params)
+        with CaptureQueriesContext(connection) as queries:
+            response = BookList.as_view()(request)
+            assert response.status_code == 200
+            assert response.streaming
+            content = b"".join(response.streaming_content).decode("utf-8")
+        assert len(queries) == 1
+        return response, content
+
+    def test_export_ndjson(self):
+        response, content = self.export({"format": "ndjson"})
+        assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+        assert [json.loads(line) for line in content.splitlines()] == [
+            {
+                "id": 1,
+                "name": "Red Book",
+                "author": {"id": 1, "name": "Leonardo"},
+                "genre": "horror",
+                "publication_date": "2012-12-12",
+            },
+            {
+                "id": 2,
+                "name": "Derby",
+                "author": {"id": 2, "name": "Jhon Smit"},
+                "genre": "Comedy",
+                "publication_date": "2020-12-12",
+            },
+        ]
+
+    def test_export_csv(self):
+        response, content = self.export({"format": "csv"})
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert content.splitlines() == [
+            "id,name,author_id,author_name,genre,publication_date",
+            "1,Red Book,1,Leonardo,horror,2012-12-12",
+            "2,Derby,2,Jhon Smit,Comedy,2020-12-12",
+        ]
+
+    def test_export_with_filter(self):
+        _, content = self.export({"format": "csv", "author__name": "jhon"})
+        assert content.splitlines()[1:] == ["2,Derby,2,Jhon Smit,Comedy,2020-12-12"]
+
+    async def test_export_streams_under_asgi(self):
+        await Book.objects.abulk_create(
+            Book(
+                name=f"Book {index}",
+                author_id=1,
+                genre="horror",
+                publication_date="2001-01-01",
+            )
+            for index in range(50)
+        )
+        encoded = []
+        encode_row = NDJSONRenderer.encode_row
+
+        def counting_encode_row(renderer, row):
+            encoded.append(row["id"])
+            return encode_row(renderer, row)
+
+        with mock.patch.object(BookList, "export_chunk_size", 10), mock.patch.object(
+            NDJSONRenderer, "encode_row", counting_encode_row
+        ):
+            response = await self.async_client.get("/api/books/?format=ndjson")
+            assert response.is_async
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            # Sent after the first chunk of rows, not the whole queryset.
+            assert json.loads(first)["id"] == 1
+            assert len(encoded) == 1
+            rest = [chunk async for chunk in chunks]
+        assert len(rest) == 51
@@ -0,0 +1,269 @@
+import json
+from collections import Counter
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from books.models import Author, Book, BookQuerySet, FacetCount
+from books.views import BookFacets
+
+
+@pytest.mark.django_db
+class TestFacets(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    def get_facets(self, query=""):
+        response = self.client.get(f"/api/books/facets/{query}")
+        assert response.status_code == 200
+        return json.loads(response.content)
+
+    def assert_summary_matches(self):
+        summary = {
+            (facet, value): count
+            for facet, value, count in FacetCount.objects.filter(
+                count__gt=0
+            ).values_list("facet", "value", "count")
+        }
+        assert summary == dict(Book.objects.facet_counts())
+
+    def test_unfiltered(self):
+        with CaptureQueriesContext(connection) as queries:
+            facets = self.get_facets()
+        assert facets == {
+            "genre": [
+                {"value": "Comedy", "count": 1},
+                {"value": "horror", "count": 1},
+            ],
+            "year": [{"value": 2012, "count": 1}, {"value": 2020, "count": 1}],
+            "author": [
+                {"id": 1, "name": "Leonardo", "count": 1},
+                {"id": 2, "name": "Jhon Smit", "count": 1},
+            ],
+        }
+        # Three summary reads and the author names, however many books.
+        assert len(queries) == 4
+        assert "books_book" not in " ".join(query["sql"] for query in queries)
+
+    def test_filtered(self):
+        Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2012-01-01",
+        )
+        facets = self.get_facets("?author__name=leo")
+        assert facets == {
+            "genre": [{"value": "horror", "count": 2}],
+            "year": [{"value": 2012, "count": 2}],
+            "author": [{"id": 1, "name": "Leonardo", "count": 2}],
+        }
+
+    def test_filtered_matches_summary(self):
+        assert self.get_facets("?name=") == self.get_facets()
+
+    def test_invalid_filter(self):
+        response = self.client.get("/api/books/facets/?publication_date__day=40")
+        assert response.status_code == 400
+
+    def test_limit(self):
+        for index in range(3):
+            Book.objects.create(
+                name=f"Book {index}",
+                author_id=2,
+                genre=f"genre {index}",
+                publication_date="2020-01-01",
+            )
+        with mock.patch.object(BookFacets, "facet_limit", 2):
+            facets = self.get_facets()
+        assert facets["author"] == [
+            {"id": 2, "name": "Jhon Smit", "count": 4},
+            {"id": 1, "name": "Leonardo", "count": 1},
+        ]
+        assert len(facets["genre"]) == 2
+
+    def test_filtered_limit_in_sql(self):
+        for index in range(3):
+            Book.objects.create(
+                name=f"Book {index}",
+                author_id=2,
+                genre=f"genre {index}",
+                publication_date="2020-01-01",
+            )
+        with mock.patch.object(BookFacets, "facet_limit", 2):
+            with CaptureQueriesContext(connection) as queries:
+                facets = self.get_facets("?name=Book")
+        grouped = [q["sql"] for q in queries if "GROUP BY" in q["sql"]]
+        assert len(grouped) == 3
+        assert all("LIMIT 2" in sql for sql in grouped)
+        assert facets["genre"] == [
+            {"value": "genre 0", "count": 1},
+            {"value": "genre 1", "count": 1},
+        ]
+        assert facets["author"] == [
+            {"id": 2, "name": "Jhon Smit", "count": 3},
+            {"id": 1, "name": "Leonardo", "count": 1},
+        ]
+
+    def test_save_and_delete(self):
+        book = Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2015-01-01",
+        )
+        self.assert_summary_matches()
+        book.genre = "Comedy"
+        book.publication_date = "2020-05-05"
+        book.author_id = 2
+        book.save()
+        self.assert_summary_matches()
+        Book(
+            pk=book.pk,
+            name="Green",
+            author_id=1,
+            genre="drama",
+            publication_date="2001-01-01",
+        ).save()
+        self.assert_summary_matches()
+        book.refresh_from_db()
+        book.delete()
+        self.assert_summary_matches()
+
+    def test_api_writes(self):
+        self.client.post(
+            "/api/books/",
+            {
+                "author": {"name": "Leonardo"},
+                "genre": "horror",
+                "name": "Green Book",
+                "publication_date": "2012-10-10",
+            },
+            content_type="application/json",
+        )
+        self.client.patch(
+            "/api/books/1", {"genre": "drama"}, content_type="application/json"
+        )
+        self.client.delete("/api/books/2")
+        self.assert_summary_matches()
+        assert self.get_facets()["genre"] == [
+            {"value": "drama", "count": 1},
+            {"value": "horror", "count": 1},
+        ]
+
+    def test_queryset_writes(self):
+        Book.objects.bulk_create(
+            [
+                Book(
+                    name=f"Book {i}",
+                    author_id=1,
+                    genre="poetry",
+                    publication_date="2001-01-01",
+                )
+                for i in range(5)
+            ]
+        )
+        self.assert_summary_matches()
+        Book.objects.filter(genre="poetry").update(genre="prose")
+        self.assert_summary_matches()
+        books = list(Book.objects.filter(genre="prose")[:2])
+        for book in books:
+            book.author_id = 2
+        Book.objects.bulk_update(books, ["author"])
+        self.assert_summary_matches()
+        Book.objects.filter(genre="prose").delete()
+        self.assert_summary_matches()
+
+    def test_update_in_batches(self):
+        with mock.patch.object(BookQuerySet, "update_batch_size", 1):
+            with CaptureQueriesContext(connection) as queries:
+                rows = Book.objects.filter(pk__gt=0).update(author_id=2)
+        assert rows == 2
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "books_book"')
+        ]
+        assert len(updates) == 2
+        self.assert_summary_matches()
+        assert Author.objects.get(pk=2).book_count == 2
+
+    def test_update_whole_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            Book.objects.update(genre="prose", publication_date="2001-01-01")
+        assert not any('"books_book"."id" IN' in query["sql"] for query in queries)
+        self.assert_summary_matches()
+        assert Author.objects.get(pk=1).latest_publication_date.year == 2001
+
+    def test_upsert_writes(self):
+        books = [
+            Book(
+                pk=pk,
+                name="Upserted",
+                author_id=2,
+                genre="poetry",
+                publication_date="2001-01-01",
+            )
+            for pk in (1, None)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            Book.objects.bulk_create(
+                books,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=["author", "genre", "publication_date"],
+            )
+        assert not any("DELETE" in query["sql"] for query in queries)
+        self.assert_summary_matches()
+        for author in Author.objects.all():
+            assert author.book_count == author.book.count()
+
+    def test_add_in_key_order(self):
+        with CaptureQueriesContext(connection) as queries:
+            FacetCount.objects.add(
+                Counter({("year", "2001"): 1, ("genre", "b"): 1, ("genre", "a"): 1})
+            )
+        sql = queries[0]["sql"]
+        assert sql.index("'a'") < sql.index("'b'") < sql.index("'2001'")
+
+    def test_author_delete_cascades(self):
+        Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2015-01-01",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            Author.objects.filter(pk=1).delete()
+        assert sum("books_facetcount" in query["sql"] for query in queries) == 1
+        self.assert_summary_matches()
+
+    def test_rebuild(self):
+        FacetCount.objects.all().delete()
+        Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2015-01-01",
+        )
+        out = StringIO()
+        call_command("rebuild_facets", stdout=out)
+        self.assert_summary_matches()
+        assert "7 facet values counted" in out.getvalue()
+
+    def test_fake_date(self):
+        call_command(
+            "fake_date",
+            authors=7,
+            books_per_author=2,
+            batch_size=3,
+            seed=1,
+            stdout=StringIO(),
+        )
+        self.assert_summary_matches()
@@ -0,0 +1,73 @@
+import subprocess
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from books.models import Author, Book
+
+
+@pytest.mark.django_db
+class TestFakeDate(TestCase):
+    @staticmethod
+    def generate(**options):
+        out = StringIO()
+        call_command("fake_date", stdout=out, **options)
+        authors = list(Author.objects.order_by("pk").values_list("name", flat=True))
+        books = list(
+            Book.objects.order_by("pk").values_list(
+                "name", "author__name", "genre", "publication_date"
+            )
+        )
+        return authors, books, out.getvalue()
+
+    def test_fake_date_counts(self):
+        authors, books, output = self.generate(
+            authors=7, books_per_author=2, batch_size=3, seed=1
+        )
+        assert len(authors) == 7
+        assert len(set(authors)) == 7
+        assert len(books) == 14
+        assert "21 rows" in output
+        assert "rows/s" in output
+
+    def test_fake_date_deterministic(self):
+        first = self.generate(authors=5, batch_size=2, seed=42)[:2]
+        second = self.generate(authors=5, batch_size=2, seed=42)[:2]
+        assert first == second
+
+    def test_fake_date_workers_deterministic(self):
+        single = self.generate(authors=6, batch_size=2, seed=3)[:2]
+        parallel = self.generate(authors=6, batch_size=2, seed=3, workers=2)[:2]
+        assert single == parallel
+
+    def test_workers_import_no_django(self):
+        # Spawned workers import the generator without the app registry.
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, books.fake_data; assert 'django' not in sys.modules",
+            ],
+            check=True,
+        )
+
+    def test_fake_date_dead_worker_fails(self):
+        call_command("loaddata", "test_books.json")
+        with mock.patch(
+            "concurrent.futures.ProcessPoolExecutor.map",
+            side_effect=BrokenProcessPool,
+        ):
+            with pytest.raises(CommandError):
+                self.generate(authors=4, batch_size=2, workers=2)
+        assert Author.objects.filter(name="Leonardo").exists()
+
+    def test_fake_date_replaces_data(self):
+        call_command("loaddata", "test_books.json")
+        self.generate(authors=2, books_per_author=1, seed=1)
+        assert not Author.objects.filter(name="Leonardo").exists()
+        assert Book.objects.count() == 2
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSparseFields(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        sql = " ".join(
+            query["sql"] for query in queries if "books_book" in query["sql"]
+        )
+        return response, sql
+
+    def test_fields(self):
+        response, sql = self.get("/api/books/?fields=id,name")
+        assert response.status_code == 200
+        assert json.loads(response.content) == [
+            {"id": 1, "name": "Red Book"},
+            {"id": 2, "name": "Derby"},
+        ]
+        assert "books_author" not in sql
+        assert '"genre"' not in sql
+        assert '"publication_date"' not in sql
+
+    def test_author_id_without_join(self):
+        response, sql = self.get("/api/books/?fields=name,author_id")
+        assert json.loads(response.content) == [
+            {"name": "Red Book", "author_id": 1},
+            {"name": "Derby", "author_id": 2},
+        ]
+        assert "JOIN" not in sql
+
+    def test_author_nested(self):
+        # The same shape as in the full output.
+        response, sql = self.get("/api/books/?fields=name,author")
+        assert json.loads(response.content) == [
+            {"name": "Red Book", "author": {"id": 1, "name": "Leonardo"}},
+            {"name": "Derby", "author": {"id": 2, "name": "Jhon Smit"}},
+        ]
+        assert "JOIN" in sql
+        full = json.loads(self.client.get("/api/books/").content)
+        assert [book["author"] for book in full] == [
+            book["author"] for book in json.loads(response.content)
+        ]
+
+    def test_unknown_fields(self):
+        response = self.client.get("/api/books/?fields=id,price")
+        assert response.status_code == 400
+        assert json.loads(response.content) == {"fields": ["Unknown field: price."]}
+
+    def test_detail(self):
+        response, sql = self.get("/api/books/1?fields=genre")
+        assert json.loads(response.content) == {"genre": "horror"}
+        assert "JOIN" not in sql
+        assert self.client.get("/api/books/3?fields=genre").status_code == 404
+
+    def test_pages(self):
+        url = "/api/books/?fields=name&ordering=-publication_date&page_size=1"
+        names = []
+        while url:
+            content = json.loads(self.client.get(url).content)
+            names.extend(book["name"] for book in content["results"])
+            url = content["next"]
+        assert names == ["Derby", "Red Book"]
+
+    def test_separate_cache_entries(self):
+        narrow = self.client.get("/api/books/1?fields=id")
+        full = self.client.get("/api/books/1")
+        assert json.loads(narrow.content) == {"id": 1}
+        assert json.loads(full.content)["name"] == "Red Book"
+        assert narrow["ETag"] != full["ETag"]
+
+    def test_export_ignores_fields(self):
+        response = self.client.get("/api/books/?format=ndjson&fields=id")
+        rows = [json.loads(line) for line in b"".join(response).splitlines()]
+        assert rows[0]["author"] == {"id": 1, "name": "Leonardo"}
+
+    async def test_async_views(self):
+        for path in [
+            "books/?fields=id,author",
+            "books/?fields=name,author_id&page_size=1",
+            "books/1?fields=publication_date",
+            "books/?fields=price",
+        ]:
+            sync = await self.async_client.get(f"/api/{path}")
+            response = await self.async_client.get(f"/api/async/{path}")
+            assert response.status_code == sync.status_code
+            assert response.content.replace(b"/api/async/", b"/api/") == sync.content
@@ -0,0 +1,143 @@
+import json
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from books.models import Author, Book
+
+
+@pytest.mark.django_db
+class TestIds(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        cache.clear()
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, [query["sql"] for query in queries]
+
+    def test_books_by_id(self):
+        response, queries = self.get("/api/books/?ids=2,1,5,2")
+        assert response.status_code == 200
+        assert [book["id"] for book in json.loads(response.content)] == [2, 1]
+        assert json.loads(response.content)[1] == json.loads(
+            self.client.get("/api/books/1").content
+        )
+        assert len(queries) == 1
+        assert "IN (2, 1, 5)" in queries[0]
+
+    def test_only_uncached_ids_fetched(self):
+        self.get("/api/books/?ids=1")
+        response, queries = self.get("/api/books/?ids=1,2")
+        assert [book["id"] for book in json.loads(response.content)] == [1, 2]
+        assert len(queries) == 1
+        assert "IN (2)" in queries[0]
+
+        response, queries = self.get("/api/books/?ids=2,1")
+        assert [book["id"] for book in json.loads(response.content)] == [2, 1]
+        assert queries == []
+
+    def count_cache_calls(self, ids):
+        cache.clear()
+        calls = []
+        methods = ["get", "get_many", "add", "set", "set_many"]
+        patches = [
+            mock.patch.object(
+                cache,
+                name,
+                side_effect=getattr(cache, name),
+            )
+            for name in methods
+        ]
+        for patch in patches:
+            calls.append(patch.start())
+        try:
+            response, _ = self.get(f"/api/books/?ids={ids}")
+        finally:
+            for patch in patches:
+                patch.stop()
+        assert response.status_code == 200
+        return {name: call.call_count for name, call in zip(methods, calls)}
+
+    def test_cold_cache_round_trips(self):
+        # Tags and rows each take one get_many() and one set_many(),
+        # however many ids there are.
+        Book.objects.bulk_create(
+            Book(
+                name=f"Book {i}",
+                author_id=1,
+                genre="horror",
+                publication_date="2020-01-01",
+            )
+            for i in range(50)
+        )
+        few = self.count_cache_calls("1,2")
+        many = self.count_cache_calls(",".join(str(pk) for pk in range(1, 53)))
+        assert many == few
+        assert many["add"] == 0
+        assert many["get_many"] == 2
+        assert many["set_many"] == 2
+
+    def test_no_response_cache(self):
+        # Whole responses are not cached or validated, only their rows.
+        response = self.client.get("/api/books/?ids=1")
+        assert not response.has_header("ETag")
+        assert "cache" not in response["Server-Timing"]
+
+    def test_writes_invalidate_rows(self):
+        self.get("/api/books/?ids=1,2")
+        book = Book.objects.get(pk=1)
+        book.name = "Blue Book"
+        book.save()
+        response, queries = self.get("/api/books/?ids=1,2")
+        assert json.loads(response.content)[0]["name"] == "Blue Book"
+        assert "IN (1)" in queries[-1]
+
+        author = Author.objects.get(pk=2)
+        author.name = "John Smith"
+        author.save()
+        response, _ = self.get("/api/books/?ids=1,2")
+        assert json.loads(response.content)[1]["author"]["name"] == "John Smith"
+
+    def test_authors_by_id(self):
+        response, _ = self.get("/api/authors/?ids=2")
+        assert json.loads(response.content) == [
+            {
+                "id": 2,
+                "name": "Jhon Smit",
+                "book_count": 1,
+                "latest_publication_date": "2020-12-12",
+            }
+        ]
+        Book.objects.create(
+            name="Green", author_id=2, genre="drama", publication_date="2021-01-01"
+        )
+        response, _ = self.get("/api/authors/?ids=2")
+        assert json.loads(response.content)[0]["book_count"] == 2
+
+    def test_fields(self):
+        response, _ = self.get("/api/books/?ids=1&fields=id,name")
+        assert json.loads(response.content) == [{"id": 1, "name": "Red Book"}]
+
+    def test_invalid_ids(self):
+        response = self.client.get("/api/books/?ids=1,a")
+        assert response.status_code == 400
+        assert json.loads(response.content) == {
+            "ids": ["Enter a comma-separated list of ids."]
+        }
+        ids = ",".join(str(pk) for pk in range(1002))
+        assert self.client.get(f"/api/books/?ids={ids}").status_code == 400
+
+    async def test_async_views(self):
+        for path in ["books/?ids=2,1", "authors/?ids=1,3", "books/?ids=x"]:
+            sync = await self.async_client.get(f"/api/{path}")
+            response = await self.async_client.get(f"/api/async/{path}")
+            assert response.status_code == sync.status_code
+            assert response.content == sync.content
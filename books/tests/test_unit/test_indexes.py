@@ -0,0 +1,88 @@
+import re
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from books.filters import BookFilter
+from books.models import Book
+from books.operations import VendorRunSQL
+
+
+@pytest.mark.django_db
+class TestIndexes(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def explain(params):
+        queryset = BookFilter(params, queryset=Book.objects.all()).qs
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+            try:
+                return queryset.explain()
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET enable_seqscan = on")
+        return queryset.explain()
+
+    def assert_no_sequential_scan(self, params):
+        plan = self.explain(params)
+        if connection.vendor == "postgresql":
+            assert "Seq Scan on books_book" not in plan, plan
+        else:
+            assert not re.search(r"\bSCAN books_book\b", plan), plan
+            assert "books_book USING" in plan, plan
+
+    def test_filter_publication_date(self):
+        self.assert_no_sequential_scan({"publication_date": "2012-12-12"})
+
+    def test_filter_publication_date_year(self):
+        self.assert_no_sequential_scan({"publication_date__year": "2012"})
+
+    # On SQLite Django binds the EXTRACT kind as a parameter, which never
+    # matches an expression index, so these only hold on PostgreSQL.
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="PostgreSQL")
+    def test_filter_publication_date_month(self):
+        self.assert_no_sequential_scan({"publication_date__month": "12"})
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="PostgreSQL")
+    def test_filter_publication_date_day(self):
+        self.assert_no_sequential_scan({"publication_date__day": "12"})
+
+    def test_month_day_indexes_only_on_postgresql(self):
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, "books_book")
+        expected = connection.vendor == "postgresql"
+        assert ("book_pub_month_idx" in indexes) is expected
+        assert ("book_pub_day_idx" in indexes) is expected
+
+    def test_filter_author_publication_date(self):
+        self.assert_no_sequential_scan(
+            {"author": "1", "publication_date__year": "2012"}
+        )
+
+
+class TestVendorRunSQL(SimpleTestCase):
+    def test_runs_on_its_vendor_only(self):
+        operation = VendorRunSQL(
+            "postgresql", sql=["SELECT 1"], reverse_sql=["SELECT 2"]
+        )
+        editor = mock.Mock()
+        editor.connection.alias = "default"
+        editor.connection.vendor = "sqlite"
+        operation.database_forwards("books", editor, None, None)
+        operation.database_backwards("books", editor, None, None)
+        editor.execute.assert_not_called()
+
+        editor.connection.vendor = "postgresql"
+        operation.database_forwards("books", editor, None, None)
+        operation.database_backwards("books", editor, None, None)
+        assert [call.args[0] for call in editor.execute.call_args_list] == [
+            "SELECT 1",
+            "SELECT 2",
+        ]
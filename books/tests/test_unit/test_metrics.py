@@ -0,0 +1,108 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.metrics import RequestMetrics, registry
+
+
+class TestRegistry(SimpleTestCase):
+    def setUp(self):
+        registry.clear()
+
+    def test_export(self):
+        recorded = RequestMetrics()
+        recorded.queries = [("SELECT 1", 0.002)]
+        recorded.db_seconds = 0.002
+        recorded.cache = "miss"
+        registry.record("books", "GET", 200, recorded, 120)
+        registry.record("books", "GET", 200, recorded, 80)
+        output = registry.export([("db_pool_size", {"alias": "default"}, 4)])
+
+        assert "# TYPE http_requests_total counter" in output
+        assert (
+            'http_requests_total{cache="miss",method="GET",status="200",'
+            'view="books"} 2' in output
+        )
+        assert 'db_queries_total{method="GET",view="books"} 2' in output
+        assert 'http_response_size_bytes_total{method="GET",view="books"} 200' in output
+        assert "# TYPE http_request_duration_seconds histogram" in output
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",view="books",'
+            'le="+Inf"} 2' in output
+        )
+        assert 'http_request_duration_seconds_count{method="GET",view="books"} 2' in (
+            output
+        )
+        assert 'db_pool_size{alias="default"} 4' in output
+
+    def test_label_escaping(self):
+        registry.record('a"b\\c', "GET", 200, RequestMetrics(), None)
+        assert 'view="a\\"b\\\\c"' in registry.export()
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        cache.clear()
+        registry.clear()
+
+    @staticmethod
+    def timings(response):
+        return dict(
+            (part.split(";", 1) + [""])[:2]
+            for part in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing(self):
+        miss = self.timings(self.client.get("/api/books/"))
+        assert miss["cache"] == 'desc="miss"'
+        assert 'desc="1 queries"' in miss["db"]
+        assert miss["serialize"].startswith("dur=")
+        assert miss["total"].startswith("dur=")
+
+        hit = self.timings(self.client.get("/api/books/"))
+        assert hit["cache"] == 'desc="hit"'
+        assert 'desc="0 queries"' in hit["db"]
+
+    def test_uncached_view(self):
+        response = self.client.get("/stats/db/")
+        assert "cache" not in self.timings(response)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        assert not self.client.get("/api/books/").has_header("Server-Timing")
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/books/")
+        self.client.get("/api/books/")
+        response = self.client.get("/metrics/")
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        output = response.content.decode()
+        assert 'cache="miss",method="GET",status="200",view="books"} 1' in output
+        assert 'cache="hit",method="GET",status="200",view="books"} 1' in output
+        assert 'db_queries_total{method="GET",view="books"} 1' in output
+        assert "http_response_size_bytes_total" in output
+
+    def test_metrics_internal_only(self):
+        response = self.client.get("/metrics/", REMOTE_ADDR="203.0.113.7")
+        assert response.status_code == 403
+
+    def test_unmatched(self):
+        self.client.get("/missing/")
+        assert 'view="unmatched"' in registry.export()
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_sql(self):
+        with self.assertLogs("core.middleware", "WARNING") as logs:
+            self.client.get("/api/books/")
+        assert "Slow request GET /api/books/ (books)" in logs.output[0]
+        assert "SELECT" in logs.output[0]
+
+    async def test_async_view(self):
+        response = await self.async_client.get("/api/async/books/")
+        timings = self.timings(response)
+        assert timings["cache"] == 'desc="miss"'
+        assert 'desc="1 queries"' in timings["db"]
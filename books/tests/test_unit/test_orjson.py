@@ -0,0 +1,102 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from books.parsers import ORJSONParser
+from books.renderers import ORJSONRenderer
+from books.views import BookDetail, BookList
+
+
+class TestORJSONRenderer(SimpleTestCase):
+    data = {
+        "id": 1,
+        "name": 'Ünïcode \u2028line\u2029 "quoted" \\ \n',
+        "author": {"id": 2, "name": "Ω"},
+        "publication_date": datetime.date(2012, 12, 12),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "price": Decimal("1.50"),
+        "lazy": gettext_lazy("Not found."),
+        "error": ErrorDetail("Value is too short.", code="invalid"),
+        "ratio": 0.1,
+        "flags": [True, False, None],
+        3: "int key",
+    }
+
+    def test_datetime(self):
+        data = {
+            "updated_at": datetime.datetime(
+                2012, 12, 12, 8, 30, tzinfo=datetime.timezone.utc
+            )
+        }
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert ORJSONRenderer().render(data) == b'{"updated_at":"2012-12-12T08:30:00Z"}'
+
+    def test_same_output_as_json_renderer(self):
+        assert ORJSONRenderer().render(self.data) == JSONRenderer().render(self.data)
+        assert ORJSONRenderer().render([self.data]) == JSONRenderer().render(
+            [self.data]
+        )
+
+    def test_empty(self):
+        assert ORJSONRenderer().render(None) == b""
+        assert ORJSONRenderer().render([]) == b"[]"
+
+    def test_indent_falls_back_to_json_renderer(self):
+        media_type = "application/json; indent=4"
+        assert ORJSONRenderer().render(self.data, media_type) == (
+            JSONRenderer().render(self.data, media_type)
+        )
+
+
+class TestORJSONParser(SimpleTestCase):
+    @staticmethod
+    def parse(content, encoding="utf-8"):
+        return ORJSONParser().parse(io.BytesIO(content), None, {"encoding": encoding})
+
+    def test_same_result_as_json_parser(self):
+        content = '{"name": "Ω", "author": {"name": "Leo"}, "n": [1, 2.5, null]}'
+        content = content.encode("utf-8")
+        assert self.parse(content) == JSONParser().parse(io.BytesIO(content))
+
+    def test_other_encoding(self):
+        assert self.parse('{"name": "Ω"}'.encode("utf-16"), "utf-16") == {"name": "Ω"}
+
+    def test_invalid(self):
+        for content in (b"{", b'{"n": NaN}', b"\xff"):
+            with pytest.raises(ParseError, match="JSON parse error"):
+                self.parse(content)
+
+
+@pytest.mark.django_db
+class TestORJSONViews(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    def test_views_render_with_orjson(self):
+        factory = APIRequestFactory()
+        for view, kwargs in ((BookList, {}), (BookDetail, {"pk": 1})):
+            response = view.as_view()(factory.get("/"), **kwargs)
+            response.render()
+            assert isinstance(response.accepted_renderer, ORJSONRenderer)
+            assert response.content == JSONRenderer().render(response.data)
+
+    def test_create_parses_with_orjson(self):
+        response = self.client.post(
+            "/api/books/",
+            b'{"name": "Orjson", "author": {"name": "Leonardo"}, '
+            b'"genre": "fantasy", "publication_date": "2020-10-10"}',
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        assert response.json()["author"] == {"id": 1, "name": "Leonardo"}
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from books.models import Author, Book
+from books.views import AuthorList, BookList
+
+
+@pytest.mark.django_db
+class TestPagination(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        author = Author.objects.get(pk=1)
+        for day in (10, 11, 11, 11, 12):
+            Book.objects.create(
+                name="Paged Book",
+                author=author,
+                genre="horror",
+                publication_date=f"2015-01-{day}",
+            )
+
+    def get_pages(self, view, params):
+        factory = APIRequestFactory()
+        pages = []
+        url = "/"
+        while url:
+            request = factory.get(url, params if url == "/" else None)
+            response = view(request)
+            response.render()
+            assert response.status_code == 200
+            content = json.loads(response.content)
+            pages.append(content["results"])
+            url = content["next"]
+        return pages
+
+    def test_get_book_list_not_paginated_by_default(self):
+        factory = APIRequestFactory()
+        request = factory.get("/")
+        response = BookList.as_view()(request)
+        response.render()
+        assert response.status_code == 200
+        assert len(json.loads(response.content)) == 7
+
+    def test_get_book_pages_by_id(self):
+        pages = self.get_pages(BookList.as_view(), {"page_size": 3})
+        assert [len(page) for page in pages] == [3, 3, 1]
+        ids = [book["id"] for page in pages for book in page]
+        assert ids == sorted(Book.objects.values_list("id", flat=True))
+
+    def test_get_book_pages_by_publication_date(self):
+        pages = self.get_pages(
+            BookList.as_view(), {"page_size": 2, "ordering": "publication_date"}
+        )
+        books = [
+            (book["publication_date"], book["id"]) for page in pages for book in page
+        ]
+        assert books == sorted(books)
+        assert len(books) == 7
+
+    def test_get_book_pages_by_publication_date_descending(self):
+        pages = self.get_pages(
+            BookList.as_view(), {"page_size": 2, "ordering": "-publication_date"}
+        )
+        books = [
+            (book["publication_date"], book["id"]) for page in pages for book in page
+        ]
+        assert books == sorted(books, reverse=True)
+        assert len(books) == 7
+
+    def test_get_book_pages_with_filter(self):
+        pages = self.get_pages(
+            BookList.as_view(),
+            {"page_size": 2, "name": "Paged", "publication_date__day": "11"},
+        )
+        assert [len(page) for page in pages] == [2, 1]
+        assert all(
+            book["publication_date"] == "2015-01-11" for page in pages for book in page
+        )
+
+    def test_get_book_incorrect_cursor(self):
+        factory = APIRequestFactory()
+        request = factory.get("/", {"cursor": "incorrect"})
+        response = BookList.as_view()(request)
+        response.render()
+        assert response.status_code == 404
+        assert json.loads(response.content) == {"detail": "Invalid cursor"}
+
+    def test_get_author_pages(self):
+        pages = self.get_pages(AuthorList.as_view(), {"page_size": 1})
+        assert pages == [
+            [
+                {
+                    "id": 1,
+                    "name": "Leonardo",
+                    "book_count": 6,
+                    "latest_publication_date": "2015-01-12",
+                }
+            ],
+            [
+                {
+                    "id": 2,
+                    "name": "Jhon Smit",
+                    "book_count": 1,
+                    "latest_publication_date": "2020-12-12",
+                }
+            ],
+        ]
@@ -0,0 +1,115 @@
+import sys
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+pytest.importorskip("psycopg")
+
+from core.db_backends.postgresql import base  # noqa: E402
+
+POOL_OPTIONS = {"min_size": 2, "max_size": 10}
+
+
+class TestPoolBackend(SimpleTestCase):
+    # No server is needed: the pool is a mock and nothing connects.
+    def setUp(self):
+        pools = mock.patch.dict(base.DatabaseWrapper._connection_pools, clear=True)
+        pools.start()
+        self.addCleanup(pools.stop)
+        pool_class = mock.patch("psycopg_pool.ConnectionPool")
+        self.ConnectionPool = pool_class.start()
+        self.addCleanup(pool_class.stop)
+
+    def wrapper(self, pool=POOL_OPTIONS, **settings):
+        settings_dict = {
+            "ENGINE": "core.db_backends.postgresql",
+            "NAME": "books",
+            "USER": "books",
+            "PASSWORD": "secret",
+            "HOST": "localhost",
+            "PORT": "",
+            "OPTIONS": {"pool": pool} if pool is not None else {},
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": False,
+            "AUTOCOMMIT": True,
+            "ATOMIC_REQUESTS": False,
+            "TIME_ZONE": None,
+            "TEST": {},
+            **settings,
+        }
+        return base.DatabaseWrapper(settings_dict, alias="pooled")
+
+    def test_no_pool(self):
+        assert self.wrapper(pool=None).pool is None
+        assert self.wrapper(pool=False).pool is None
+        self.ConnectionPool.assert_not_called()
+
+    def test_pool(self):
+        wrapper = self.wrapper()
+        assert wrapper.pool is self.ConnectionPool.return_value
+        # One pool per alias and database, shared by every thread's wrapper.
+        assert self.wrapper().pool is wrapper.pool
+        self.ConnectionPool.assert_called_once()
+        kwargs = self.ConnectionPool.call_args.kwargs
+        assert kwargs["open"] is False
+        assert kwargs["check"] is None
+        assert kwargs["name"] == "pooled"
+        assert kwargs["min_size"] == 2
+        assert kwargs["max_size"] == 10
+        assert kwargs["kwargs"]["autocommit"] is True
+        assert kwargs["kwargs"]["dbname"] == "books"
+        assert "pool" not in kwargs["kwargs"]
+
+    def test_pool_defaults(self):
+        self.wrapper(pool=True, CONN_HEALTH_CHECKS=True).pool
+        kwargs = self.ConnectionPool.call_args.kwargs
+        assert kwargs["check"] is self.ConnectionPool.check_connection
+        assert "min_size" not in kwargs
+
+    def test_pool_needs_conn_max_age_0(self):
+        with pytest.raises(ImproperlyConfigured, match="CONN_MAX_AGE"):
+            self.wrapper(CONN_MAX_AGE=60).pool
+        self.ConnectionPool.assert_not_called()
+
+    def test_pool_needs_psycopg3(self):
+        with mock.patch.object(base, "is_psycopg3", False):
+            with pytest.raises(ImproperlyConfigured, match="psycopg 3"):
+                self.wrapper().pool
+
+    def test_pool_needs_psycopg_pool(self):
+        with mock.patch.dict(sys.modules, {"psycopg_pool": None}):
+            with pytest.raises(ImproperlyConfigured, match="psycopg\\[pool\\]"):
+                self.wrapper().pool
+
+    def test_connection_params(self):
+        params = self.wrapper().get_connection_params()
+        assert "pool" not in params
+        assert params["dbname"] == "books"
+
+    def test_connection_from_pool(self):
+        wrapper = self.wrapper()
+        pool = self.ConnectionPool.return_value
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        assert connection is pool.getconn.return_value
+        pool.open.assert_called_once()
+        pool.getconn.assert_called_once()
+
+    def test_close_returns_connection(self):
+        wrapper = self.wrapper()
+        pool = self.ConnectionPool.return_value
+        connection = wrapper.connection = mock.Mock()
+        wrapper.close()
+        pool.putconn.assert_called_once_with(connection)
+        connection.close.assert_not_called()
+        assert wrapper.connection is None
+        wrapper._close()
+        pool.putconn.assert_called_once()
+
+    def test_close_without_pool(self):
+        wrapper = self.wrapper(pool=None)
+        connection = wrapper.connection = mock.Mock()
+        wrapper.close()
+        connection.close.assert_called_once()
+        self.ConnectionPool.return_value.putconn.assert_not_called()
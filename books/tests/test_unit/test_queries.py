@@ -0,0 +1,49 @@
+import pytest
+from django.core.management import call_command
+from django.test import TestCase
+
+from books.models import Author, Book
+from books.testing import assert_constant_queries
+from books.views import AuthorList, BookDetail, BookList
+
+
+@pytest.mark.django_db
+class TestQueries(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def add_books(count):
+        start = Author.objects.count()
+        for i in range(start, start + count):
+            author = Author.objects.create(name=f"Author {i}")
+            Book.objects.create(
+                name=f"Book {i}",
+                author=author,
+                genre="horror",
+                publication_date="2020-10-10",
+            )
+
+    def test_book_list_queries(self):
+        assert_constant_queries(BookList.as_view(), self.add_books, expected=1)
+
+    def test_book_list_paginated_queries(self):
+        assert_constant_queries(
+            BookList.as_view(), self.add_books, expected=1, url="/?page_size=20"
+        )
+
+    def test_book_list_filter_queries(self):
+        assert_constant_queries(
+            BookList.as_view(), self.add_books, expected=1, url="/?genre=horror"
+        )
+
+    def test_author_list_queries(self):
+        assert_constant_queries(AuthorList.as_view(), self.add_books, expected=1)
+
+    def test_book_detail_queries(self):
+        # Without a cache the ETag seed is looked up on every request.
+        view = BookDetail.as_view()
+        assert_constant_queries(
+            lambda request: view(request, pk=1), self.add_books, expected=2
+        )
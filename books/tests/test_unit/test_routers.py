@@ -0,0 +1,83 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from books.models import Book
+from core.middleware import ReplicaPinningMiddleware
+from core.routers import PrimaryReplicaRouter, routing_state
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0", "replica_1"])
+class TestPrimaryReplicaRouter(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_replicas(self):
+        with routing_state():
+            aliases = {self.router.db_for_read(Book) for _ in range(50)}
+        assert aliases == {"replica_0", "replica_1"}
+
+    def test_writes_go_to_primary(self):
+        with routing_state():
+            assert self.router.db_for_write(Book) == "default"
+
+    def test_read_after_write_pinned(self):
+        with routing_state() as state:
+            self.router.db_for_write(Book)
+            assert self.router.db_for_read(Book) == "default"
+        assert state["wrote"]
+
+    def test_pinned_state(self):
+        with routing_state(pinned=True):
+            assert self.router.db_for_read(Book) == "default"
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        with routing_state():
+            assert self.router.db_for_read(Book) == "default"
+
+    def test_allow_migrate(self):
+        assert self.router.allow_migrate("default", "books")
+        assert not self.router.allow_migrate("replica_0", "books")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_SECONDS=7)
+class TestReplicaPinningMiddleware(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def read(self, request):
+        return HttpResponse(self.router.db_for_read(Book))
+
+    def write(self, request):
+        self.router.db_for_write(Book)
+        return self.read(request)
+
+    def test_get_reads_replica(self):
+        response = ReplicaPinningMiddleware(self.read)(RequestFactory().get("/"))
+        assert response.content == b"replica_0"
+        assert "db_primary" not in response.cookies
+
+    def test_write_pins_client(self):
+        response = ReplicaPinningMiddleware(self.write)(RequestFactory().post("/"))
+        assert response.content == b"default"
+        assert response.cookies["db_primary"]["max-age"] == 7
+
+    def test_pinned_client_reads_primary(self):
+        request = RequestFactory().get("/")
+        request.COOKIES["db_primary"] = "1"
+        response = ReplicaPinningMiddleware(self.read)(request)
+        assert response.content == b"default"
+
+    def test_unsafe_request_reads_primary(self):
+        response = ReplicaPinningMiddleware(self.read)(RequestFactory().delete("/"))
+        assert response.content == b"default"
+        assert "db_primary" not in response.cookies
+
+    def test_async_write_pins_client(self):
+        async def write(request):
+            return self.write(request)
+
+        middleware = ReplicaPinningMiddleware(write)
+        response = async_to_sync(middleware)(RequestFactory().patch("/"))
+        assert response.content == b"default"
+        assert "db_primary" in response.cookies
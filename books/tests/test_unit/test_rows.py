@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from books.models import Author, Book
+from books.serializers import AuthorSerializer, BookSerializer
+from books.views import AuthorDetail, AuthorList, BookDetail, BookList
+
+
+@pytest.mark.django_db
+class TestRows(TestCase):
+    # The views build GET responses from values() rows; the bytes must be
+    # those the serializers produce from model instances.
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        author = Author.objects.create(name='Ünïcode "Author"')
+        Book.objects.create(
+            name="Ω book, with 'quotes'",
+            author=author,
+            genre="sci-fi",
+            publication_date="1999-01-02",
+        )
+
+    @staticmethod
+    def get(view, params=None, **kwargs):
+        request = APIRequestFactory().get("/", params)
+        response = view.as_view()(request, **kwargs)
+        response.render()
+        assert response.status_code == 200
+        return response.content
+
+    @staticmethod
+    def serialize(serializer, instance, many=False):
+        return JSONRenderer().render(serializer(instance, many=many).data)
+
+    def test_book_list(self):
+        books = Book.objects.select_related("author").order_by("pk")
+        assert self.get(BookList) == self.serialize(BookSerializer, books, True)
+
+    def test_book_list_search(self):
+        books = Book.objects.filter(name__icontains="book").order_by("pk")
+        content = self.get(BookList, {"q": "book"})
+        assert sorted(content[1:-1].split(b"},{")) == sorted(
+            self.serialize(BookSerializer, books, True)[1:-1].split(b"},{")
+        )
+
+    def test_book_page(self):
+        books = Book.objects.order_by("publication_date", "pk")[:2]
+        content = self.get(BookList, {"page_size": 2, "ordering": "publication_date"})
+        results = self.serialize(BookSerializer, books, True)
+        assert content.startswith(b'{"next":"http://testserver/')
+        assert content.endswith(b',"results":' + results + b"}")
+
+    def test_book_detail(self):
+        for book in Book.objects.all():
+            assert self.get(BookDetail, pk=book.pk) == self.serialize(
+                BookSerializer, book
+            )
+
+    def test_author_list(self):
+        authors = Author.objects.order_by("pk")
+        assert self.get(AuthorList) == self.serialize(AuthorSerializer, authors, True)
+
+    def test_author_detail(self):
+        for author in Author.objects.all():
+            assert self.get(AuthorDetail, pk=author.pk) == self.serialize(
+                AuthorSerializer, author
+            )
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from books.models import Author, Book
+from books.search import install_search
+from books.views import BookList
+
+
+@pytest.mark.django_db
+class TestSearch(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+
+    @staticmethod
+    def search(query):
+        factory = APIRequestFactory()
+        request = factory.get("/", {"q": query})
+        response = BookList.as_view()(request)
+        response.render()
+        assert response.status_code == 200
+        return [book["id"] for book in json.loads(response.content)]
+
+    def test_search_book_name(self):
+        assert self.search("red") == [1]
+
+    def test_search_prefix_and_terms(self):
+        assert self.search("Der com") == [2]
+        assert self.search("red comedy") == []
+
+    def test_search_author_name(self):
+        assert self.search("jhon") == [2]
+
+    def test_search_across_fields(self):
+        # One document per book: terms may match the book or its author.
+        assert self.search("derby jhon") == [2]
+        assert self.search("horror leo red") == [1]
+        assert self.search("derby leo") == []
+
+    def test_search_ranked(self):
+        author = Author.objects.get(pk=2)
+        book = Book.objects.create(
+            name="Red Red Red",
+            author=author,
+            genre="red",
+            publication_date="2010-01-01",
+        )
+        assert self.search("red") == [book.pk, 1]
+
+    def test_search_ranked_pages(self):
+        author = Author.objects.get(pk=2)
+        for name in ["Qux other", "Qux qux qux", "Qux qux"]:
+            Book.objects.create(
+                name=name, author=author, genre="drama", publication_date="2010-01-01"
+            )
+        ranked = self.search("qux")
+        assert len(ranked) == 3
+        assert ranked != sorted(ranked)
+
+        factory = APIRequestFactory()
+        url = "/?q=qux&page_size=1&ordering=publication_date"
+        ids = []
+        while url:
+            response = BookList.as_view()(factory.get(url))
+            response.render()
+            content = json.loads(response.content)
+            ids.extend(book["id"] for book in content["results"])
+            assert "search_rank" not in content["results"][0]
+            url = content["next"]
+        assert ids == ranked
+
+    def test_search_follows_updates(self):
+        Book.objects.filter(pk=1).update(name="Blue Book")
+        Author.objects.filter(pk=1).update(name="Donatello")
+        assert self.search("red") == []
+        assert self.search("blue donatello") == [1]
+
+        Book.objects.filter(pk=1).delete()
+        assert self.search("blue") == []
+
+    def test_search_with_filters(self):
+        factory = APIRequestFactory()
+        request = factory.get("/", {"q": "book", "genre": "comedy"})
+        response = BookList.as_view()(request)
+        response.render()
+        assert json.loads(response.content) == []
+
+    def test_search_empty_query(self):
+        assert self.search("!!") == []
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite triggers")
+    def test_install_search_restores_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER books_book_fts_insert")
+            cursor.execute("DELETE FROM books_book_fts")
+        install_search(connection)
+        assert self.search("red") == [1]
@@ -0,0 +1,191 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from books import cache as books_cache
+from books.cache import asingle_flight, single_flight
+from books.models import Book
+from books.views import BookList
+from core.routers import routing_state
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def run_concurrently(function, count=8):
+    barrier = threading.Barrier(count)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(function())
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@override_settings(CACHES=LOCMEM)
+class TestSingleFlight(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def slow_build(self, builds, value="fresh"):
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            cache.set("key", value)
+            return value
+
+        return build
+
+    def test_concurrent_misses_build_once(self):
+        builds = []
+        results = run_concurrently(
+            lambda: single_flight(
+                "key", lambda: cache.get("key"), self.slow_build(builds)
+            )
+        )
+        assert len(builds) == 1
+        assert results == ["fresh"] * 8
+
+    def test_stale_served_while_building(self):
+        builds = []
+        results = run_concurrently(
+            lambda: single_flight(
+                "key",
+                lambda: cache.get("key"),
+                self.slow_build(builds),
+                stale=lambda: "stale",
+            )
+        )
+        assert len(builds) == 1
+        assert sorted(results) == ["fresh"] + ["stale"] * 7
+
+    def test_hit_skips_build(self):
+        cache.set("key", "cached")
+        build = mock.Mock()
+        assert single_flight("key", lambda: cache.get("key"), build) == "cached"
+        build.assert_not_called()
+
+    def test_lock_released_after_error(self):
+        def build():
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            single_flight("key", lambda: None, build)
+        assert cache.get("key:lock") is None
+
+    def test_waiter_builds_when_lock_released_empty(self):
+        cache.add("key:lock", 1)
+        threading.Timer(0.1, cache.delete, ["key:lock"]).start()
+        assert single_flight("key", lambda: None, lambda: "own") == "own"
+
+    @mock.patch.object(books_cache, "WAIT_TIMEOUT", 0.1)
+    def test_waiter_builds_after_timeout(self):
+        cache.add("key:lock", 1)
+        assert single_flight("key", lambda: None, lambda: "own") == "own"
+
+    def test_async(self):
+        builds = []
+
+        async def fetch():
+            return await cache.aget("key")
+
+        async def build():
+            builds.append(1)
+            await cache.aset("key", "fresh")
+            return "fresh"
+
+        async def stale():
+            return "stale"
+
+        cache.add("key:lock", 1)
+        assert async_to_sync(asingle_flight)("key", fetch, build, stale) == "stale"
+        cache.delete("key:lock")
+        assert async_to_sync(asingle_flight)("key", fetch, build, stale) == "fresh"
+        assert async_to_sync(asingle_flight)("key", fetch, build, stale) == "fresh"
+        assert len(builds) == 1
+
+
+@pytest.mark.django_db
+@override_settings(CACHES=LOCMEM)
+class TestStaleWhileRevalidate(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        cache.clear()
+
+    @staticmethod
+    def get(**extra):
+        request = APIRequestFactory().get("/api/books/", **extra)
+        with CaptureQueriesContext(connection) as queries:
+            response = BookList.as_view()(request)
+            response.render()
+        return response, len(queries)
+
+    def hold_lock(self):
+        # As if another request were rebuilding the current version.
+        request = APIRequestFactory().get("/api/books/")
+        key, _ = BookList().get_cache_key(request)
+        cache.add(f"{key}:lock", 1)
+
+    def test_stale_served_during_rebuild(self):
+        first, _ = self.get()
+        Book.objects.get(pk=1).save()
+        self.hold_lock()
+        with routing_state():
+            stale, queries = self.get()
+        assert queries == 0
+        assert stale.content == first.content
+        assert stale["ETag"] == first["ETag"]
+
+    @mock.patch.object(books_cache, "WAIT_TIMEOUT", 0.1)
+    def test_pinned_client_not_served_stale(self):
+        self.get()
+        book = Book.objects.get(pk=1)
+        book.name = "Blue Book"
+        book.save()
+        self.hold_lock()
+        with routing_state(pinned=True):
+            fresh, queries = self.get()
+        assert queries == 1
+        assert b"Blue Book" in fresh.content
+
+    def test_rebuild_after_lock_released(self):
+        first, _ = self.get()
+        book = Book.objects.get(pk=1)
+        book.name = "Blue Book"
+        book.save()
+
+        fresh, queries = self.get()
+        assert queries == 1
+        assert fresh["ETag"] != first["ETag"]
+        assert b"Blue Book" in fresh.content
+        again, queries = self.get()
+        assert queries == 0
+        assert again.content == fresh.content
+
+    def test_no_stale_entry_waits_for_builder(self):
+        self.get()
+        response = self.get()[0]
+        request = APIRequestFactory().get("/api/books/")
+        key, _ = BookList().get_cache_key(request)
+        cache.delete(key)
+        cache.delete(books_cache.stale_cache_key(request, None))
+        cache.add(f"{key}:lock", 1)
+        threading.Timer(0.1, cache.set, [key, response]).start()
+        waited, queries = self.get()
+        assert queries == 0
+        assert waited.content == response.content
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from books.models import Author, Book
+from books.views import BookDetail
+
+
+@pytest.mark.django_db
+class TestUpdate(TestCase):
+    def setUp(self):
+        call_command("flush", "--noinput")
+        call_command("loaddata", "test_books.json")
+        self.saves = []
+        post_save.connect(self.record_save, sender=Book)
+
+    def tearDown(self):
+        post_save.disconnect(self.record_save, sender=Book)
+
+    def record_save(self, sender, instance, update_fields, **kwargs):
+        self.saves.append(update_fields)
+
+    @staticmethod
+    def patch(data):
+        factory = APIRequestFactory()
+        request = factory.patch("/", data, format="json")
+        with CaptureQueriesContext(connection) as queries:
+            response = BookDetail.as_view()(request, pk=1)
+            response.render()
+        assert response.status_code == 200
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        return json.loads(response.content), updates
+
+    def test_patch_unchanged(self):
+        book, updates = self.patch(
+            {"name": "Red Book", "genre": "horror", "author": {"name": "Leonardo"}}
+        )
+        assert book["name"] == "Red Book"
+        assert updates == []
+        assert self.saves == []
+
+    def test_patch_changed_field(self):
+        book, updates = self.patch({"name": "Red Book", "genre": "Drama"})
+        assert book["genre"] == "Drama"
+        assert len(updates) == 1
+        assert '"genre"' in updates[0]
+        assert '"name"' not in updates[0]
+        assert self.saves == [frozenset({"genre", "updated_at"})]
+
+    def test_patch_changed_author(self):
+        book, updates = self.patch({"genre": "Drama", "author": {"name": "Jhon Smit"}})
+        assert book["author"] == {"id": 2, "name": "Jhon Smit"}
+        # The book, then the book counts of its old and new author.
+        assert len(updates) == 2
+        assert updates[1].startswith('UPDATE "books_author" SET "book_count"')
+        assert self.saves == [frozenset({"genre", "author", "updated_at"})]
+        assert Book.objects.get(pk=1).author_id == 2
+
+    def test_patch_date_keeps_author_stats(self):
+        Book.objects.create(
+            name="Green Book",
+            author_id=1,
+            genre="horror",
+            publication_date="2022-01-01",
+        )
+        updated_at = Author.objects.get(pk=1).updated_at
+        list_response = self.client.get("/api/authors/")
+        book, updates = self.patch({"publication_date": "2010-01-01"})
+        assert book["publication_date"] == "2010-01-01"
+        # The author's count and latest date stay, so the author's UPDATE
+        # matches no row and the author list stays cached.
+        assert len(updates) == 2
+        assert Author.objects.get(pk=1).updated_at == updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/authors/")
+        assert response["ETag"] == list_response["ETag"]
+        assert len(queries) == 0
@@ -1,9 +1,28 @@
 from django.urls import path
-from books.views import AuthorList, AuthorDetail, BookList, BookDetail
+from books.async_views import (
+    AsyncAuthorDetail,
+    AsyncAuthorList,
+    AsyncBookDetail,
+    AsyncBookList,
+)
+from books.views import (
+    AuthorList,
+    AuthorDetail,
+    BookBulk,
+    BookDetail,
+    BookFacets,
+    BookList,
+)
 
 urlpatterns = [
     path("authors/", AuthorList.as_view(), name="authors"),
     path("authors/<int:pk>", AuthorDetail.as_view(), name="authors"),
     path("books/", BookList.as_view(), name="books"),
     path("books/<int:pk>", BookDetail.as_view(), name="books"),
+    path("books/bulk/", BookBulk.as_view(), name="books-bulk"),
+    path("books/facets/", BookFacets.as_view(), name="books-facets"),
+    path("async/authors/", AsyncAuthorList.as_view(), name="async-authors"),
+    path("async/authors/<int:pk>", AsyncAuthorDetail.as_view(), name="async-authors"),
+    path("async/books/", AsyncBookList.as_view(), name="async-books"),
+    path("async/books/<int:pk>", AsyncBookDetail.as_view(), name="async-books"),
 ]
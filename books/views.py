@@ -1,54 +1,444 @@
-from django.core.cache import cache
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from rest_framework import generics
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import generics, serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from .cache import CacheResponseMixin, get_cached_rows, version_from_datetime
 from .filters import AuthorFilter, BookFilter
-from .models import Author, Book
+from .models import Author, Book, FacetCount
+from .pagination import AuthorPagination, BookPagination
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer, book_from_row
 from .serializers import AuthorSerializer, BookSerializer
 
 
-@method_decorator(cache_page(60 * 5), name="dispatch")
-class AuthorList(generics.ListCreateAPIView):
+class RowReadMixin:
+    # GETs build the response from `values(*row_fields)` rows instead of
+    # model instances run through the serializer, whose per-field work
+    # dominates large lists. `from_row` must give the serializer's output.
+    row_fields = None
+    # `?fields=`: output field -> row field, or {key: row field} for nested
+    # objects. Only the columns and joins of the requested fields are
+    # selected.
+    field_rows = None
+    # `?ids=1,2,3` on lists: the rows with these ids, cached one by one
+    # under their `<row_cache_tag>:<pk>` tag, in the requested order.
+    row_cache_tag = None
+    max_ids = 1000
+
+    @staticmethod
+    def from_row(row):
+        return row
+
+    @staticmethod
+    def split_param(value):
+        return [name for name in (part.strip() for part in value.split(",")) if name]
+
+    def get_sparse_fields(self):
+        # The requested fields, or None for the full output.
+        fields = self.split_param(self.request.GET.get("fields", ""))
+        if self.field_rows is None or not fields:
+            return None
+        unknown = [name for name in fields if name not in self.field_rows]
+        if unknown:
+            raise ValidationError(
+                {"fields": [f"Unknown field: {name}." for name in unknown]}
+            )
+        return fields
+
+    def get_row_fields(self, sparse):
+        if sparse is None:
+            return self.row_fields
+        # The id and the page ordering, for the cursors.
+        columns = {"id"}
+        pagination_class = getattr(self, "pagination_class", None)
+        if pagination_class and hasattr(pagination_class, "get_ordering"):
+            _, ordering = pagination_class().get_ordering(self.request)
+            columns.update(field.lstrip("-") for field in ordering)
+        for name in sparse:
+            rows = self.field_rows[name]
+            columns.update(rows.values() if isinstance(rows, dict) else [rows])
+        return [field for field in self.row_fields if field in columns]
+
+    def format_row(self, row, sparse):
+        if sparse is None:
+            return self.from_row(row)
+        data = {}
+        for name in sparse:
+            rows = self.field_rows[name]
+            if isinstance(rows, dict):
+                data[name] = {key: row[field] for key, field in rows.items()}
+            else:
+                data[name] = row[rows]
+        return data
+
+    def get_ids(self):
+        try:
+            ids = [int(pk) for pk in self.split_param(self.request.GET["ids"])]
+        except ValueError:
+            raise ValidationError({"ids": ["Enter a comma-separated list of ids."]})
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.max_ids:
+            raise ValidationError(
+                {"ids": [f"Ensure there are no more than {self.max_ids} ids."]}
+            )
+        return ids
+
+    def get_rows_by_id(self, ids):
+        # Filters and pagination do not apply.
+        rows = get_cached_rows(
+            self.row_cache_tag,
+            ids,
+            lambda pks: self.get_queryset().filter(pk__in=pks).values(*self.row_fields),
+            self.cache_timeout,
+        )
+        return [rows[pk] for pk in ids if pk in rows]
+
+    def get_rows(self, fields=None):
+        rows = self.filter_queryset(self.get_queryset()).values(
+            *(fields or self.row_fields)
+        )
+        # Without an order, narrow rows may come back in index order.
+        return rows if rows.ordered else rows.order_by("pk")
+
+    def list(self, request, *args, **kwargs):
+        sparse = self.get_sparse_fields()
+        if self.row_cache_tag and "ids" in request.GET:
+            rows = self.get_rows_by_id(self.get_ids())
+            return Response([self.format_row(row, sparse) for row in rows])
+        rows = self.get_rows(self.get_row_fields(sparse))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                [self.format_row(row, sparse) for row in page]
+            )
+        return Response([self.format_row(row, sparse) for row in rows])
+
+    def retrieve(self, request, *args, **kwargs):
+        sparse = self.get_sparse_fields()
+        lookup = {self.lookup_field: kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        row = self.get_rows(self.get_row_fields(sparse)).filter(**lookup).first()
+        if row is None:
+            raise Http404
+        return Response(self.format_row(row, sparse))
+
+
+class AuthorList(RowReadMixin, CacheResponseMixin, generics.ListCreateAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
+    row_fields = ["id", "name", "book_count", "latest_publication_date"]
+    row_cache_tag = "author"
+    uncached_params = ["ids"]
     filterset_class = AuthorFilter
+    pagination_class = AuthorPagination
     search_fields = ["name"]
 
-    @receiver(post_save, sender=Author)
-    def authors_clear_cache(sender, instance, **kwargs):
-        cache.clear()
+    def get_cache_tags(self, **kwargs):
+        return ["authors"]
 
 
-@method_decorator(cache_page(60 * 5), name="dispatch")
-class AuthorDetail(generics.RetrieveUpdateDestroyAPIView):
+class AuthorDetailCache:
+    # Cache tags shared by the sync and async author detail views.
+    def get_cache_tags(self, **kwargs):
+        return [f"author:{kwargs['pk']}"]
+
+    def get_cache_seed(self, **kwargs):
+        updated_at = (
+            Author.objects.filter(pk=kwargs["pk"])
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        return updated_at and version_from_datetime(updated_at)
+
+
+class AuthorDetail(
+    AuthorDetailCache,
+    RowReadMixin,
+    CacheResponseMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
+    row_fields = AuthorList.row_fields
 
-    @receiver(post_save, sender=Author)
-    def author_clear_cache(sender, instance, **kwargs):
-        cache.clear()
 
-
-@method_decorator(cache_page(60 * 5), name="dispatch")
-class BookList(generics.ListCreateAPIView):
-    queryset = Book.objects.all()
+class BookList(RowReadMixin, CacheResponseMixin, generics.ListCreateAPIView):
+    queryset = Book.objects.select_related("author")
     serializer_class = BookSerializer
     filterset_class = BookFilter
+    pagination_class = BookPagination
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        NDJSONRenderer,
+        CSVRenderer,
+    ]
     search_fields = ["name"]
+    row_cache_tag = "book"
+    uncached_params = ["ids"]
+    row_fields = [
+        "id",
+        "name",
+        "author_id",
+        "author__name",
+        "genre",
+        "publication_date",
+    ]
+    from_row = staticmethod(book_from_row)
+    # The author is nested as in the full output; `author_id` alone skips
+    # the join.
+    field_rows = {
+        "id": "id",
+        "name": "name",
+        "author": {"id": "author_id", "name": "author__name"},
+        "author_id": "author_id",
+        "genre": "genre",
+        "publication_date": "publication_date",
+    }
+    export_chunk_size = 2000
+
+    def get_cache_tags(self, **kwargs):
+        return ["books"]
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, StreamingRenderer):
+            return super().list(request, *args, **kwargs)
+
+        # `?format=ndjson|csv`: stream every matching row through a
+        # server-side cursor instead of building the page in memory. The
+        # exports have fixed columns, so `?fields=` does not apply. ASGI
+        # servers read a sync iterator into a list before sending it, so
+        # there the rows come from the async iterator.
+        rows = self.get_rows()
+        if isinstance(request._request, ASGIRequest):
+            content = renderer.astream(
+                rows.aiterator(chunk_size=self.export_chunk_size)
+            )
+        else:
+            content = renderer.stream(rows.iterator(chunk_size=self.export_chunk_size))
+        response = StreamingHttpResponse(
+            content,
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="books.{renderer.format}"'
+        return response
+
+
+class BookDetailCache:
+    # Cache tags shared by the sync and async book detail views.
+    def get_cache_tags(self, **kwargs):
+        return [f"book:{kwargs['pk']}"]
+
+    def get_cache_seed(self, **kwargs):
+        # The response embeds the author, so its changes count as well.
+        row = (
+            Book.objects.filter(pk=kwargs["pk"])
+            .values_list("updated_at", "author__updated_at")
+            .first()
+        )
+        return row and version_from_datetime(max(row))
 
-    @receiver(post_save, sender=Book)
-    def books_clear_cache(sender, instance, **kwargs):
-        cache.clear()
 
+class BookDetail(
+    BookDetailCache,
+    RowReadMixin,
+    CacheResponseMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
+    queryset = Book.objects.select_related("author")
+    serializer_class = BookSerializer
+    row_fields = BookList.row_fields
+    from_row = staticmethod(book_from_row)
+    field_rows = BookList.field_rows
+
+
+class BookFacets(CacheResponseMixin, generics.GenericAPIView):
+    # Books per genre, publication year and author for the BookList filters,
+    # the most frequent `facet_limit` values of each. Filtered requests count
+    # in one grouped query per facet; unfiltered ones read the FacetCount
+    # summary.
+    queryset = Book.objects.all()
+    filterset_class = BookFilter
+    facets = FacetCount.facets
+    facet_limit = 100
+
+    def get_cache_tags(self, **kwargs):
+        # Author names are part of the response.
+        return ["books", "authors"]
 
-@method_decorator(cache_page(60 * 5), name="dispatch")
-class BookDetail(generics.RetrieveUpdateDestroyAPIView):
+    def is_filtered(self):
+        params = self.request.query_params
+        return any(params.get(name) for name in self.filterset_class.base_filters)
+
+    def get_top_counts(self):
+        if not self.is_filtered():
+            summary = FacetCount.objects.filter(count__gt=0).order_by("-count", "value")
+            return {
+                facet: list(
+                    summary.filter(facet=facet).values_list("value", "count")[
+                        : self.facet_limit
+                    ]
+                )
+                for facet in self.facets
+            }
+        books = self.filter_queryset(self.get_queryset())
+        return books.top_facet_counts(self.facet_limit)
+
+    def get(self, request, *args, **kwargs):
+        top = self.get_top_counts()
+        author_ids = [int(value) for value, _ in top["author"]]
+        names = dict(Author.objects.filter(pk__in=author_ids).values_list("pk", "name"))
+        return Response(
+            {
+                "genre": [
+                    {"value": value, "count": count} for value, count in top["genre"]
+                ],
+                "year": [
+                    {"value": int(value), "count": count}
+                    for value, count in top["year"]
+                ],
+                "author": [
+                    {"id": pk, "name": names.get(pk), "count": count}
+                    for pk, (_, count) in zip(author_ids, top["author"])
+                ],
+            }
+        )
+
+
+class BookBulk(generics.GenericAPIView):
+    # Accepts a JSON array or NDJSON and answers with one result per item,
+    # in the same order. Authors are resolved and rows written in batches.
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser]
+    batch_size = 1000
+    id_field = serializers.IntegerField()
+
+    @staticmethod
+    def get_items(request):
+        if not isinstance(request.data, list):
+            raise ValidationError("Expected a list of items.")
+        return request.data
+
+    @staticmethod
+    def bulk_response(results, item_status, response_status):
+        if all(result["status"] == item_status for result in results):
+            return Response(results, status=response_status)
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+
+    @staticmethod
+    def get_ids(items):
+        return [pk for pk in items if type(pk) is int]
+
+    @staticmethod
+    def not_found():
+        return {"status": status.HTTP_404_NOT_FOUND, "errors": {"detail": "Not found."}}
+
+    def resolve_authors(self, validated):
+        names = [data["author"]["name"] for data in validated if "author" in data]
+        return Author.objects.resolve_names(names, batch_size=self.batch_size)
+
+    def post(self, request, *args, **kwargs):
+        results, valid = [], []
+        for item in self.get_items(request):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((len(results), serializer.validated_data))
+                results.append(None)
+            else:
+                results.append(
+                    {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+                )
+
+        with transaction.atomic():
+            author_ids = self.resolve_authors([data for _, data in valid])
+            books = []
+            for _, data in valid:
+                author = data.pop("author")
+                books.append(Book(author_id=author_ids[author["name"]], **data))
+            Book.objects.bulk_create(books, batch_size=self.batch_size)
+
+        for (index, _), book in zip(valid, books):
+            results[index] = {"status": status.HTTP_201_CREATED, "id": book.pk}
+        return self.bulk_response(
+            results, status.HTTP_201_CREATED, status.HTTP_201_CREATED
+        )
+
+    def patch(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+        instances = self.get_queryset().in_bulk(self.get_ids(ids))
+
+        results, valid = [], []
+        for pk, item in zip(ids, items):
+            instance = instances.get(pk) if type(pk) is int else None
+            if instance is None:
+                results.append(self.not_found())
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            if serializer.is_valid():
+                valid.append((len(results), instance, serializer.validated_data))
+                results.append(None)
+            else:
+                results.append(
+                    {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+                )
+
+        with transaction.atomic():
+            author_ids = self.resolve_authors([data for _, _, data in valid])
+            fields = set()
+            for _, instance, data in valid:
+                author = data.pop("author", None)
+                if author:
+                    instance.author_id = author_ids[author["name"]]
+                    fields.add("author")
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                fields.update(data)
+            if fields:
+                Book.objects.bulk_update(
+                    [instance for _, instance, _ in valid],
+                    sorted(fields),
+                    batch_size=self.batch_size,
+                )
+
+        for index, instance, _ in valid:
+            results[index] = {"status": status.HTTP_200_OK, "id": instance.pk}
+        return self.bulk_response(results, status.HTTP_200_OK, status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        # Items are ids; anything that is not an integer gets a 400 result.
+        ids, errors = [], []
+        for item in self.get_items(request):
+            try:
+                ids.append(self.id_field.run_validation(item))
+                errors.append(None)
+            except ValidationError as exc:
+                ids.append(None)
+                errors.append(
+                    {"status": status.HTTP_400_BAD_REQUEST, "errors": exc.detail}
+                )
+        existing = list(self.get_queryset().in_bulk(self.get_ids(ids)))
+        with transaction.atomic():
+            for start in range(0, len(existing), self.batch_size):
+                batch = existing[start : start + self.batch_size]
+                Book.objects.filter(pk__in=batch).delete()
 
-    @receiver(post_save, sender=Book)
-    def book_clear_cache(sender, instance, **kwargs):
-        cache.clear()
+        deleted = set(existing)
+        results = [
+            error
+            or (
+                {"status": status.HTTP_204_NO_CONTENT, "id": pk}
+                if pk in deleted
+                else self.not_found()
+            )
+            for pk, error in zip(ids, errors)
+        ]
+        return self.bulk_response(
+            results, status.HTTP_204_NO_CONTENT, status.HTTP_200_OK
+        )
@@ -0,0 +1,144 @@
+import zlib
+
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Smaller bodies do not shrink enough to be worth it.
+MIN_SIZE = 200
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits 31: a gzip header and trailer, with a zero mtime so the same
+        # content always compresses to the same bytes.
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# In order of preference when the client accepts several equally.
+COMPRESSORS = {
+    **({"br": BrotliCompressor} if brotli else {}),
+    **({"zstd": ZstdCompressor} if zstandard else {}),
+    "gzip": GzipCompressor,
+}
+
+
+def negotiate(accept_encoding):
+    # The best coding from an Accept-Encoding header, or None for identity.
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding.lower()] = weight
+    candidates = [
+        (weights.get(coding, weights.get("*", 0.0)), -index, coding)
+        for index, coding in enumerate(COMPRESSORS)
+    ]
+    weight, _, coding = max(candidates)
+    return coding if weight > 0 else None
+
+
+def compress(content, coding):
+    compressor = COMPRESSORS[coding]()
+    return compressor.compress(content) + compressor.finish()
+
+
+def compress_sequence(chunks, coding):
+    compressor = COMPRESSORS[coding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_sequence(chunks, coding):
+    compressor = COMPRESSORS[coding]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_response(response, coding):
+    # Encodes the response in place. Returns whether it did: responses that
+    # are already encoded, small, or that would not shrink stay as they are.
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if coding is None or response.has_header("Content-Encoding"):
+        return False
+    if response.streaming:
+        sequence = acompress_sequence if response.is_async else compress_sequence
+        response.streaming_content = sequence(response.streaming_content, coding)
+        del response["Content-Length"]
+    else:
+        if len(response.content) < MIN_SIZE:
+            return False
+        compressed = compress(response.content, coding)
+        if len(compressed) >= len(response.content):
+            return False
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+    response["Content-Encoding"] = coding
+    return True
+
+
+def carries_csrf_token(request, response):
+    # get_token() flags the request when a page embeds the CSRF token, as the
+    # browsable API's forms do. Compressing such a page next to content an
+    # attacker can reflect leaks the token through the size (BREACH).
+    return response.get("Content-Type", "").startswith("text/html") and bool(
+        request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def encoded_etag(etag, coding):
+    # Each encoding is a different representation, so a strong ETag gets
+    # the coding appended: "abc" becomes "abc-gzip".
+    if not etag or not coding or etag.startswith("W/"):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
@@ -0,0 +1,121 @@
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # PostgreSQL with an optional psycopg 3 connection pool per process,
+    # enabled with OPTIONS["pool"] (True or ConnectionPool keyword arguments),
+    # the option Django 5.1 adds natively. Without it connections are opened
+    # directly and persist for CONN_MAX_AGE. Either way `get_stats()` reports
+    # how many connections this process opened and how long that took, plus
+    # the pool's size and wait times when pooled.
+    _connection_pools = {}
+    _connect_stats = {}
+    _stats_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not options:
+            return None
+        # Keyed by name too: the test runner points an alias at another one.
+        key = (self.alias, self.settings_dict["NAME"])
+        if key not in self._connection_pools:
+            if self.settings_dict["CONN_MAX_AGE"] != 0:
+                raise ImproperlyConfigured(
+                    "A pooled database needs CONN_MAX_AGE = 0, connections "
+                    "go back to the pool at the end of each request."
+                )
+            if not is_psycopg3:
+                raise ImproperlyConfigured("Connection pooling needs psycopg 3.")
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError as error:
+                raise ImproperlyConfigured(
+                    "Error loading psycopg_pool module. "
+                    "Did you install psycopg[pool]?"
+                ) from error
+            # Django switches autocommit itself once it has the connection.
+            kwargs = {**self.get_connection_params(), "autocommit": True}
+            check = None
+            if self.settings_dict["CONN_HEALTH_CHECKS"]:
+                check = ConnectionPool.check_connection
+            pool = ConnectionPool(
+                kwargs=kwargs,
+                open=False,
+                check=check,
+                name=self.alias,
+                **({} if options is True else options),
+            )
+            # Threads racing at startup may build several; one wins.
+            self._connection_pools.setdefault(key, pool)
+        return self._connection_pools[key]
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            started = time.perf_counter()
+            connection = super().get_new_connection(conn_params)
+            self.record_connect(time.perf_counter() - started)
+            return connection
+
+        # The same isolation level handling as the parent, on a pooled
+        # connection.
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = IsolationLevel(
+                options.get("isolation_level", IsolationLevel.READ_COMMITTED)
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level "
+                f"{options['isolation_level']} specified. "
+                f"Use one of the psycopg.IsolationLevel values."
+            )
+        pool.open()
+        connection = pool.getconn()
+        if "isolation_level" in options:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def record_connect(self, seconds):
+        with self._stats_lock:
+            stats = self._connect_stats.setdefault(
+                self.alias, {"connections_num": 0, "connections_ms": 0}
+            )
+            stats["connections_num"] += 1
+            stats["connections_ms"] += round(seconds * 1000)
+
+    def get_stats(self):
+        pool = self.pool
+        if pool is None:
+            with self._stats_lock:
+                return {
+                    "connections_num": 0,
+                    "connections_ms": 0,
+                    **self._connect_stats.get(self.alias, {}),
+                }
+        # pool_size, pool_available, requests_waiting, requests_wait_ms,
+        # connections_num, connections_ms, ... since the pool was opened.
+        return pool.get_stats()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self.pool
+        if pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+        # The connection belongs to the pool again.
+        self.connection = None
@@ -0,0 +1,174 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+# Request metrics of this worker process, in the Prometheus text format.
+# Like /stats/db/, each gunicorn worker keeps its own counters: scrape every
+# worker, or sum over the `instance` label.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    # Filled in while a request runs; the middleware reports it at the end.
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.cache = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # A connection execute_wrapper timing every query.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_seconds += duration
+            self.queries.append((sql, duration))
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def record_request():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    # An execute_wrapper on every connection, timing the queries of the
+    # request recording in this context, if any.
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+@receiver(request_started)
+def install_query_recorder(**kwargs):
+    # Connections are per thread, and under ASGI a request's queries run in
+    # the thread request_started is sent in, not in the middleware's. The
+    # wrapper goes first, so execute_wrapper() blocks still pop their own.
+    for connection in connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def serializing():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.serialize_seconds += time.perf_counter() - started
+
+
+def set_cache_status(status):
+    # "hit", "miss", "stale" or "not_modified", from the response cache.
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache = status
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            buckets, total, count = self.histograms.get(
+                key, ([0] * len(DURATION_BUCKETS), 0.0, 0)
+            )
+            buckets = [
+                number + (value <= bound)
+                for number, bound in zip(buckets, DURATION_BUCKETS)
+            ]
+            self.histograms[key] = (buckets, total + value, count + 1)
+
+    def record(self, view, method, status, metrics, size):
+        labels = {"view": view, "method": method}
+        self.inc(
+            "http_requests_total",
+            {**labels, "status": str(status), "cache": metrics.cache or "none"},
+        )
+        self.observe("http_request_duration_seconds", labels, metrics.elapsed)
+        self.inc("db_queries_total", labels, len(metrics.queries))
+        self.inc("db_query_duration_seconds_total", labels, metrics.db_seconds)
+        self.inc("serialize_duration_seconds_total", labels, metrics.serialize_seconds)
+        if size is not None:
+            self.inc("http_response_size_bytes_total", labels, size)
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def export(self, gauges=()):
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), (buckets, total, count) in histograms:
+            header(name, "histogram")
+            for bound, number in zip(DURATION_BUCKETS, buckets):
+                bucket_labels = (*labels, ("le", str(bound)))
+                lines.append(f"{name}_bucket{format_labels(bucket_labels)} {number}")
+            inf_labels = (*labels, ("le", "+Inf"))
+            lines.append(f"{name}_bucket{format_labels(inf_labels)} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        for name, labels, value in gauges:
+            header(name, "gauge")
+            lines.append(f"{name}{format_labels(tuple(labels.items()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+registry = Registry()
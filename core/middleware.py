@@ -0,0 +1,138 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from core import metrics
+from core.compression import (
+    carries_csrf_token,
+    compress_response,
+    encoded_etag,
+    negotiate,
+)
+from core.routers import routing_state
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    # Records each request's latency, database queries and time,
+    # serialization time, response cache status and size in the /metrics/
+    # registry, and reports them to the client in a Server-Timing header.
+    # Requests slower than SLOW_REQUEST_MS log their SQL. First in
+    # MIDDLEWARE, so it measures the whole stack and compressed sizes.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with metrics.record_request() as recorded:
+            response = self.get_response(request)
+        return self.report(request, response, recorded)
+
+    async def __acall__(self, request):
+        with metrics.record_request() as recorded:
+            response = await self.get_response(request)
+        return self.report(request, response, recorded)
+
+    def report(self, request, response, recorded):
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        size = None if response.streaming else len(response.content)
+        elapsed = recorded.elapsed
+        metrics.registry.record(
+            view, request.method, response.status_code, recorded, size
+        )
+
+        if settings.SERVER_TIMING:
+            timings = [
+                f"db;dur={recorded.db_seconds * 1000:.1f};"
+                f'desc="{len(recorded.queries)} queries"',
+                f"serialize;dur={recorded.serialize_seconds * 1000:.1f}",
+                f"total;dur={elapsed * 1000:.1f}",
+            ]
+            if recorded.cache:
+                timings.insert(0, f'cache;desc="{recorded.cache}"')
+            response["Server-Timing"] = ", ".join(timings)
+
+        if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+            logger.warning(
+                "Slow request %s %s (%s): %.0fms, %d queries in %.0fms\n%s",
+                request.method,
+                request.get_full_path(),
+                view,
+                elapsed * 1000,
+                len(recorded.queries),
+                recorded.db_seconds * 1000,
+                "\n".join(
+                    f"{duration * 1000:8.1f}ms  {sql}"
+                    for sql, duration in recorded.queries
+                ),
+            )
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    # GZipMiddleware with brotli and zstd when they are installed, choosing
+    # by the client's Accept-Encoding. Responses the cached views already
+    # encoded pass through untouched, as do files (which ServeStatic serves
+    # precompressed) and pages that embed a CSRF token. Streaming exports
+    # are compressed chunk by chunk.
+    def process_response(self, request, response):
+        if isinstance(response, FileResponse) or carries_csrf_token(request, response):
+            return response
+        coding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if compress_response(response, coding) and response.has_header("ETag"):
+            response["ETag"] = encoded_etag(response["ETag"], coding)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    # Unsafe requests run on the primary only. Once a request has written,
+    # a short-lived cookie keeps the client's following reads on the primary
+    # until the replicas have caught up.
+    sync_capable = True
+    async_capable = True
+    cookie_name = "db_primary"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def is_pinned(self, request):
+        return (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            or self.cookie_name in request.COOKIES
+        )
+
+    def pin_client(self, response, state):
+        if state["wrote"] and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_state(self.is_pinned(request)) as state:
+            response = self.get_response(request)
+        return self.pin_client(response, state)
+
+    async def __acall__(self, request):
+        with routing_state(self.is_pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.pin_client(response, state)
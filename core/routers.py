@@ -0,0 +1,59 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Per request (or, outside requests, per thread or task) routing state. A
+# dict, so writes made in threads the ORM runs on under ASGI still reach
+# the request that started them.
+_state = ContextVar("replica_routing", default=None)
+
+
+@contextmanager
+def routing_state(pinned=False):
+    state = {"pinned": pinned, "wrote": False}
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def is_pinned():
+    state = _state.get()
+    return state is not None and state["pinned"]
+
+
+def pin_to_primary():
+    state = _state.get()
+    if state is None:
+        _state.set({"pinned": True, "wrote": True})
+    else:
+        state["pinned"] = state["wrote"] = True
+
+
+class PrimaryReplicaRouter:
+    # Reads go to a random alias from DATABASE_REPLICAS, writes to the
+    # primary. After a write, reads in the same request stay on the primary,
+    # and ReplicaPinningMiddleware keeps the client's next requests there
+    # too, so nobody reads their own writes stale from a lagging replica.
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication.
+        return db not in settings.DATABASE_REPLICAS
@@ -17,8 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import database_stats, metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api-auth/", include("rest_framework.urls")),
     path("api/", include("books.urls")),
+    path("stats/db/", database_stats, name="database-stats"),
+    path("metrics/", metrics, name="metrics"),
 ]
@@ -0,0 +1,57 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+
+from core.metrics import registry
+
+
+def internal(view):
+    # Worker internals are only served to staff users and to the addresses
+    # in INTERNAL_STATS_IPS, such as a Prometheus scraper's.
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        user = getattr(request, "user", None)
+        if request.META.get("REMOTE_ADDR") not in settings.INTERNAL_STATS_IPS and not (
+            user and user.is_staff
+        ):
+            raise PermissionDenied
+        return view(request, *args, **kwargs)
+
+    return wrapped
+
+
+@internal
+def database_stats(request):
+    # Connection metrics of this worker process, per database alias. Pooled
+    # PostgreSQL reports pool_size, pool_available, requests_waiting and
+    # requests_wait_ms; compare max_size times the worker count with
+    # PostgreSQL's max_connections.
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        get_stats = getattr(connection, "get_stats", None)
+        stats[alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            **(get_stats() if get_stats else {}),
+        }
+    return JsonResponse(stats)
+
+
+@internal
+def metrics(request):
+    # Request metrics of this worker process in the Prometheus text format,
+    # with the numeric database stats above as db_<stat> gauges.
+    gauges = []
+    for alias in connections:
+        get_stats = getattr(connections[alias], "get_stats", None)
+        for name, value in (get_stats() if get_stats else {}).items():
+            if isinstance(value, (int, float)):
+                gauges.append((f"db_{name}", {"alias": alias}, value))
+    return HttpResponse(
+        registry.export(gauges),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )